@@ -0,0 +1,500 @@
+import itertools
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import runner
+from consts import *
+
+SYNC_DATA_MAX = 64 * 1024  # sync协议中单个DATA块的最大长度
+
+
+class AdbError(Exception):
+    """adb服务器返回FAIL或协议数据异常时抛出"""
+
+
+class AdbConnection:
+    """
+    与adb服务器之间的一条socket连接。
+
+    adb服务器的协议为：客户端发送4位十六进制长度+请求内容，服务器回复OKAY或FAIL（FAIL后跟4位十六进制长度+错误信息）。
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.pooled = False  # 是否取自连接池（建立后闲置过一段时间）
+        self.replied = False  # 是否已收到服务器的任何数据
+
+    def send(self, request):
+        data = request.encode('utf-8')
+        self.sock.sendall(b'%04x' % len(data) + data)
+
+    def read_exact(self, size):
+        buf = bytearray()
+        while len(buf) < size:
+            chunk = self.sock.recv(size - len(buf))
+            if not chunk:
+                raise AdbError('adb服务器意外关闭了连接')
+            self.replied = True
+            buf += chunk
+        return bytes(buf)
+
+    def read_hex_length_data(self):
+        length = int(self.read_exact(4), 16)
+        return self.read_exact(length).decode('utf-8', errors='replace')
+
+    def check_okay(self):
+        status = self.read_exact(4)
+        if status == b'OKAY':
+            return
+        if status == b'FAIL':
+            raise AdbError(self.read_hex_length_data())
+        raise AdbError(f'未知的adb服务器响应: {status!r}')
+
+    def request(self, request):
+        self.send(request)
+        self.check_okay()
+
+    def read_all(self):
+        chunks = []
+        while chunk := self.sock.recv(65536):
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class AdbClient:
+    """
+    纯Python实现的adb服务器（默认localhost:5037）客户端，每次查询只需一次socket往返，无需启动adb进程。
+
+    adb服务器在处理完一次请求后会关闭该连接，因此连接池中保存的是已建立但尚未使用的空闲连接，
+    在归还时补充，使建立连接的开销不落在下一次查询的关键路径上；同时限制与服务器的最大并发连接数。
+    """
+
+    def __init__(self, host=ADB_HOST, port=ADB_PORT, pool_size=ADB_POOL_SIZE, timeout=ADB_SOCKET_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(pool_size * 4)
+        self._sessions = {}
+
+    def _open(self, timeout=None):
+        sock = socket.create_connection((self.host, self.port), timeout=timeout or self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return AdbConnection(sock)
+
+    def connect(self, timeout=None):
+        """
+        从连接池取出一条连接，连接池为空时新建。
+
+        参数:
+            timeout (float, optional): socket超时时间（秒）。默认为self.timeout。
+
+        返回值:
+            AdbConnection: 与adb服务器的连接，使用完毕后应调用release()归还。
+
+        异常:
+            ConnectionRefusedError: adb服务器未启动。
+            TimeoutError: 超过timeout仍未等到空闲的连接名额。
+        """
+        if not self._slots.acquire(timeout=timeout or self.timeout):
+            raise TimeoutError('等待adb服务器连接超时')
+        try:
+            with self._lock:
+                conn = self._idle.popleft() if self._idle else None
+            if conn is None:
+                conn = self._open(timeout)
+            else:
+                conn.pooled = True
+                conn.sock.settimeout(timeout or self.timeout)
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        """关闭已使用的连接，并为连接池补充一条空闲连接。"""
+        conn.close()
+        self._slots.release()
+        with self._lock:
+            if len(self._idle) >= self.pool_size:
+                return
+        try:
+            spare = self._open()
+        except OSError:
+            return
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(spare)
+                return
+        spare.close()
+
+    def clear_pool(self):
+        """关闭所有空闲连接，adb服务器重启后应调用。"""
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for conn in idle:
+            conn.close()
+
+    def _connect_request(self, request, timeout=None):
+        """
+        取出一条连接并发送第一个请求。
+
+        空闲连接可能已被重启的adb服务器关闭，这种连接在收到任何回复前就会失败：此时清空连接池，用新连接重试一次。
+
+        返回值:
+            AdbConnection: 服务器已回复OKAY的连接，使用完毕后应调用release()归还。
+        """
+        conn = self.connect(timeout)
+        try:
+            try:
+                conn.request(request)
+            except (OSError, AdbError):
+                if not conn.pooled or conn.replied:
+                    raise
+                conn.close()
+                self.clear_pool()
+                conn = self._open(timeout)
+                conn.request(request)
+        except BaseException:
+            self.release(conn)
+            raise
+        return conn
+
+    def host_query(self, request, timeout=None):
+        """
+        执行一次host服务查询（如host:version、host:devices-l）。
+
+        参数:
+            request (str): 请求内容。
+            timeout (float, optional): socket超时时间（秒）。
+
+        返回值:
+            str: 服务器返回的数据。
+
+        异常:
+            AdbError: 服务器返回FAIL。
+        """
+        conn = self._connect_request(request, timeout)
+        try:
+            return conn.read_hex_length_data()
+        finally:
+            self.release(conn)
+
+    def version(self):
+        return int(self.host_query('host:version'), 16)
+
+    def devices(self):
+        """
+        获取设备列表（host:devices-l）。
+
+        返回值:
+            list: 由(serial, state, props)组成的列表，props为model、product、transport_id等属性的字典。
+        """
+        return parse_devices_l(self.host_query('host:devices-l'))
+
+    def open_stream(self, *requests):
+        """
+        打开一条不属于连接池、无超时的长连接，并依次发送requests。
+
+        返回值:
+            AdbConnection: 长连接，使用完毕后直接close()。
+        """
+        conn = self._open()
+        conn.sock.settimeout(None)
+        try:
+            for request in requests:
+                conn.request(request)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def track_devices(self):
+        """
+        打开一条host:track-devices长连接。此后每当设备列表变化，服务器都会推送一次完整的设备状态列表，
+        可通过read_hex_length_data()读取并用parse_device_states()解析。关闭该连接即停止跟踪。
+
+        返回值:
+            AdbConnection: 不属于连接池的长连接，无超时。
+        """
+        return self.open_stream('host:track-devices')
+
+    def transport(self, serial=None, timeout=None):
+        """
+        打开一条已切换到目标设备的连接。
+
+        参数:
+            serial (str, optional): 设备代号。为None时与adb命令行一致，使用环境变量ANDROID_SERIAL，仍为空则使用任意设备。
+            timeout (float, optional): socket超时时间（秒）。
+
+        返回值:
+            AdbConnection: 已切换到目标设备的连接，使用完毕后应调用release()归还。
+        """
+        return self._connect_request(transport_request(serial), timeout)
+
+    def _run_service(self, serial, service, timeout):
+        conn = self.transport(serial, timeout)
+        try:
+            conn.request(service)
+            return conn.read_all()
+        finally:
+            self.release(conn)
+
+    def shell(self, serial, command, timeout=None):
+        """
+        在设备上执行shell命令，等价于adb -s <serial> shell <command>。
+
+        返回值:
+            str: 命令的输出（stdout与stderr合并）。
+        """
+        return self._run_service(serial, f'shell:{command}', timeout).decode('utf-8', errors='replace')
+
+    def exec_out(self, serial, command, timeout=None):
+        """
+        在设备上执行命令并返回原始stdout，等价于adb -s <serial> exec-out <command>。
+
+        返回值:
+            bytes: 命令的原始输出。
+        """
+        return self._run_service(serial, f'exec:{command}', timeout)
+
+    def push(self, serial, data, remote_path, mode=0o644, timeout=None):
+        """
+        通过sync协议把数据写入设备上的文件，等价于adb -s <serial> push。
+
+        参数:
+            serial (str): 设备代号。
+            data (bytes): 文件内容。
+            remote_path (str): 设备上的目标路径。
+            mode (int, optional): 文件权限。默认为0o644。
+            timeout (float, optional): socket超时时间（秒）。
+
+        异常:
+            AdbError: 设备拒绝写入（如路径不可写）。
+        """
+        conn = self.transport(serial, timeout)
+        try:
+            conn.request('sync:')
+            path = f'{remote_path},{0o100000 | mode}'.encode('utf-8')
+            conn.sock.sendall(b'SEND' + struct.pack('<I', len(path)) + path)
+            for offset in range(0, len(data), SYNC_DATA_MAX):
+                chunk = data[offset:offset + SYNC_DATA_MAX]
+                conn.sock.sendall(b'DATA' + struct.pack('<I', len(chunk)) + chunk)
+            conn.sock.sendall(b'DONE' + struct.pack('<I', int(time.time())))
+            status = conn.read_exact(4)
+            length, = struct.unpack('<I', conn.read_exact(4))
+            if status != b'OKAY':
+                raise AdbError(conn.read_exact(length).decode('utf-8', errors='replace'))
+        finally:
+            self.release(conn)
+
+    def shell_session(self, serial):
+        """
+        获取设备的常驻shell会话，不存在时创建。
+
+        参数:
+            serial (str): 设备代号。
+
+        返回值:
+            ShellSession: 该设备的常驻shell会话。
+        """
+        with self._lock:
+            session = self._sessions.get(serial)
+            if session is None or session.closed:
+                session = self._sessions[serial] = ShellSession(self, serial)
+            return session
+
+    def close_session(self, serial):
+        """关闭设备的常驻shell会话，设备断开或状态变化时应调用。"""
+        with self._lock:
+            session = self._sessions.pop(serial, None)
+        if session:
+            session.close()
+
+    def close_sessions(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+    def kill_server(self):
+        """关闭adb服务器。"""
+        self.close_sessions()
+        self.clear_pool()
+        try:
+            conn = self.connect()
+        except ConnectionRefusedError:
+            return
+        try:
+            conn.send('host:kill')
+            conn.check_okay()
+        except (AdbError, OSError):
+            pass
+        finally:
+            self.release(conn)
+            self.clear_pool()
+
+    def start_server(self):
+        """启动adb服务器。协议本身无法启动服务器，因此仍需调用一次adb进程。"""
+        runner.run([ADB, 'start-server'], timeout=ADB_SERVER_TIMEOUT)
+        self.clear_pool()
+
+
+class ShellSession:
+    """
+    设备上的常驻shell会话：在一条adb连接上运行一个sh进程，之后的多条命令都通过它执行，省去每次建立shell的开销。
+
+    每条命令的输出以带序号的结束标记分帧，标记中同时带有退出码。多个调用方的请求进入队列，由会话线程依次执行。
+    连接出错或命令超时后当前连接会被丢弃，下一条命令自动重连。
+    """
+
+    def __init__(self, client, serial):
+        self.client = client
+        self.serial = serial
+        self.closed = False
+        self._conn = None
+        self._buffer = b''
+        self._queue = queue.Queue()
+        self._counter = itertools.count()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def run(self, command, timeout=None):
+        """
+        在会话中执行命令。
+
+        参数:
+            command (str): shell命令。
+            timeout (float, optional): 超时时间（秒），包括在队列中等待前面命令的时间。默认为SHELL_SESSION_TIMEOUT。
+
+        返回值:
+            tuple: (output, exit_code)，output为stdout与stderr合并后的输出。
+
+        异常:
+            OSError: 连接失败或超时（TimeoutError）。
+            AdbError: adb服务器返回FAIL或会话已关闭。
+        """
+        timeout = timeout or SHELL_SESSION_TIMEOUT
+        future = Future()
+        self._queue.put((command, time.monotonic() + timeout, future))
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # 仍在排队时直接撤销；已经开始执行的命令到同一截止时间也会超时，随后断开连接
+            future.cancel()
+            raise TimeoutError(f'shell命令超时: {command}') from None
+
+    def close(self):
+        self.closed = True
+        self._queue.put(None)
+        self._disconnect()
+
+    def _disconnect(self):
+        conn, self._conn = self._conn, None
+        self._buffer = b''
+        if conn:
+            conn.close()
+
+    def _worker(self):
+        while (job := self._queue.get()) is not None:
+            command, deadline, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            if self.closed:
+                future.set_exception(AdbError('shell会话已关闭'))
+                continue
+            if time.monotonic() >= deadline:
+                future.set_exception(TimeoutError(f'shell命令超时: {command}'))
+                continue
+            try:
+                future.set_result(self._execute(command, deadline))
+            except BaseException as e:
+                self._disconnect()
+                future.set_exception(e)
+        while not self._queue.empty():
+            if job := self._queue.get_nowait():
+                job[2].set_exception(AdbError('shell会话已关闭'))
+
+    def _execute(self, command, deadline):
+        if self._conn is None:
+            self._conn = self.client.open_stream(transport_request(self.serial), 'shell:sh')
+        self._conn.sock.settimeout(max(deadline - time.monotonic(), 0))
+        marker = f'@@PYQTSCRCPY_END_{next(self._counter)}@@'.encode()
+        script = f"{{ {command}\n}} </dev/null 2>&1; printf '\\n%s %d\\n' {marker.decode()} $?\n"
+        self._conn.sock.sendall(script.encode('utf-8'))
+
+        end = b'\n' + marker + b' '
+        while (index := self._buffer.find(end)) < 0 or b'\n' not in self._buffer[index + len(end):]:
+            if (remaining := deadline - time.monotonic()) <= 0:
+                raise TimeoutError(f'shell命令超时: {command}')
+            self._conn.sock.settimeout(remaining)
+            chunk = self._conn.sock.recv(65536)
+            if not chunk:
+                raise AdbError('shell会话被设备关闭')
+            self._buffer += chunk
+        output = self._buffer[:index]
+        code_end = self._buffer.index(b'\n', index + len(end))
+        exit_code = int(self._buffer[index + len(end):code_end])
+        self._buffer = self._buffer[code_end + 1:]
+        return output.decode('utf-8', errors='replace'), exit_code
+
+
+def transport_request(serial=None):
+    """返回切换到设备的请求。serial为None时与adb命令行一致，使用环境变量ANDROID_SERIAL，仍为空则使用任意设备。"""
+    serial = serial or os.environ.get('ANDROID_SERIAL')
+    return f'host:transport:{serial}' if serial else 'host:transport-any'
+
+
+def parse_devices_l(data):
+    """
+    解析host:devices-l返回的设备列表。
+
+    返回值:
+        list: 由(serial, state, props)组成的列表。
+    """
+    devices = []
+    for line in data.splitlines():
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        props = dict(part.split(':', 1) for part in parts[2:] if ':' in part)
+        devices.append((parts[0], parts[1], props))
+    return devices
+
+
+def parse_device_states(data):
+    """
+    解析host:devices或host:track-devices返回的设备列表。
+
+    返回值:
+        dict: 键是设备代号，值是设备状态（device、unauthorized、offline等）。
+    """
+    states = {}
+    for line in data.splitlines():
+        parts = line.split(None, 1)
+        if len(parts) == 2:
+            states[parts[0]] = parts[1].strip()
+    return states
+
+
+client = AdbClient()
@@ -0,0 +1,319 @@
+import asyncio
+import subprocess
+import threading
+
+import adb_client
+import runner
+import scrcpy_server
+import util
+from consts import *
+from device_cache import cache
+
+
+async def _adb_request(requests, timeout=None):
+    """打开一条到adb服务器的连接，依次发送requests并返回(reader, writer)。"""
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(adb_client.client.host, adb_client.client.port), timeout or ADB_SOCKET_TIMEOUT)
+    try:
+        for data in requests:
+            data = data.encode('utf-8')
+            writer.write(b'%04x' % len(data) + data)
+            status = await reader.readexactly(4)
+            if status == b'FAIL':
+                length = int(await reader.readexactly(4), 16)
+                raise adb_client.AdbError((await reader.readexactly(length)).decode('utf-8', errors='replace'))
+            if status != b'OKAY':
+                raise adb_client.AdbError(f'未知的adb服务器响应: {status!r}')
+    except BaseException:
+        writer.close()
+        raise
+    return reader, writer
+
+
+async def host_query(request, timeout=None):
+    """异步执行一次host服务查询，参见AdbClient.host_query()。"""
+    async def _():
+        reader, writer = await _adb_request([request], timeout)
+        try:
+            length = int(await reader.readexactly(4), 16)
+            return (await reader.readexactly(length)).decode('utf-8', errors='replace')
+        finally:
+            writer.close()
+
+    return await asyncio.wait_for(_(), timeout or ADB_SOCKET_TIMEOUT)
+
+
+async def shell(device_id, command, timeout=None, on_line=None):
+    """
+    异步执行shell命令，等价于adb -s <device_id> shell <command>。
+    给出on_line时逐行读取输出，每读到一行（含换行符）即调用一次on_line(line)。
+
+    异常:
+        asyncio.TimeoutError: 超过timeout（默认为SHELL_SESSION_TIMEOUT）仍未完成。
+    """
+    async def _():
+        reader, writer = await _adb_request(
+            [adb_client.transport_request(util.current_serial(device_id)), f'shell:{command}'], timeout)
+        try:
+            if on_line is None:
+                return (await reader.read()).decode('utf-8', errors='replace')
+            lines = []
+            while line := await reader.readline():
+                lines.append(line.decode('utf-8', errors='replace'))
+                on_line(lines[-1])
+            return ''.join(lines)
+        finally:
+            writer.close()
+
+    return await asyncio.wait_for(_(), timeout or SHELL_SESSION_TIMEOUT)
+
+
+async def _cached(device_id, key, load):
+    if device_id is None:
+        return await load()
+    value = cache.get(device_id, key)
+    if value is None:
+        value = await load()
+        cache.set(device_id, key, value)
+    return value
+
+
+_background_tasks = set()
+
+
+async def get_fingerprint(device_id):
+    """util.get_fingerprint()的异步版本。"""
+    try:
+        return (await get_snapshot(device_id)).fingerprint or None
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, adb_client.AdbError):
+        return None
+
+
+async def cached_capability(device_id, key, load, cancel_token=None):
+    """util.cached_capability()的异步版本，load为参数是取消令牌的协程函数，后台验证以asyncio任务进行。"""
+    if device_id is None:
+        return await load(cancel_token)
+    if (value := cache.get(device_id, key)) is not None:
+        return value
+
+    fingerprint = await get_fingerprint(device_id)
+    value, revalidate = util.load_stored_capability(device_id, key, fingerprint)
+    if value is not None:
+        if revalidate:
+            async def revalidate():
+                try:
+                    fresh = await load(None)
+                except (OSError, asyncio.TimeoutError, subprocess.SubprocessError, adb_client.AdbError):
+                    return
+                util.save_capability(device_id, key, fingerprint, fresh, value)
+
+            task = asyncio.ensure_future(revalidate())
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        return value
+
+    value = await load(cancel_token)
+    util.save_capability(device_id, key, fingerprint, value)
+    return value
+
+
+async def devices():
+    """util.devices()的异步版本，所有设备名称在同一线程上并发获取。"""
+    try:
+        device_list = adb_client.parse_devices_l(await host_query('host:devices-l'))
+    except ConnectionRefusedError:
+        await runner.run_async([ADB, 'start-server'], ADB_SERVER_TIMEOUT)
+        device_list = adb_client.parse_devices_l(await host_query('host:devices-l'))
+
+    devices = {serial: None for serial, status, _ in device_list if status == 'device'}
+    unauthorized_devices = [serial for serial, status, _ in device_list if status == 'unauthorized']
+    offline_devices = [serial for serial, status, _ in device_list if status == 'offline']
+    cache.retain(devices)
+
+    semaphore = asyncio.Semaphore(DEVICE_NAME_WORKERS)
+
+    async def name(device_id):
+        async with semaphore:
+            return await get_device_name(device_id)
+
+    names = await asyncio.gather(*(name(device_id) for device_id in devices))
+    return dict(zip(devices, names)), unauthorized_devices, offline_devices
+
+
+async def get_snapshot(device_id=None, timeout=None):
+    """util.get_snapshot()的异步版本。"""
+    device_id = util.current_serial(device_id)
+
+    async def load():
+        return util.DeviceSnapshot.parse(await shell(device_id, util.snapshot_command(), timeout))
+
+    return await _cached(device_id, 'snapshot', load)
+
+
+async def get_device_name(device_id, timeout=DEVICE_NAME_TIMEOUT):
+    """util.get_device_name()的异步版本。"""
+    try:
+        return (await get_snapshot(device_id, timeout)).name
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, adb_client.AdbError):
+        return UNKNOWN_DEVICE_NAME
+
+
+async def list_output(option, device_id=None, timeout=PROBE_TIMEOUT, cancel_token=None, check=False, on_line=None):
+    """
+    util.list_output()的异步版本，同样只在部署或server出错时退回scrcpy客户端。部署server在线程池中进行，直接启动server的shell连接随协程取消而断开。
+    给出on_line时边运行边逐行回调输出；直接启动server失败而退回scrcpy客户端时，输出会从头再回调一遍。
+
+    异常:
+        subprocess.CalledProcessError: check为True且scrcpy返回码非0。
+        asyncio.TimeoutError: 超过timeout仍未完成。
+        runner.ProbeCancelled: 被取消。
+    """
+    server_option = util.server_option(option)
+    if device_id:
+        try:
+            command = await asyncio.get_running_loop().run_in_executor(
+                None, scrcpy_server.list_command, device_id, server_option)
+            output = await shell(device_id, command, timeout, on_line)
+            if cancel_token and cancel_token.cancelled:
+                raise runner.ProbeCancelled(command)
+            return scrcpy_server.check_list_output(server_option, output)
+        except (TimeoutError, asyncio.TimeoutError, subprocess.TimeoutExpired):
+            # 超时说明设备本身没有响应，换用scrcpy客户端只会再等一个完整的截止时间
+            raise
+        except (OSError, asyncio.IncompleteReadError, subprocess.SubprocessError, adb_client.AdbError):
+            pass
+
+    command = util.scrcpy_command(option, device_id)
+    returncode, output = await runner.run_async(command, timeout, cancel_token, on_line)
+    if check and returncode:
+        raise subprocess.CalledProcessError(returncode, command, output)
+    return output
+
+
+async def get_displays(device_id=None, cancel_token=None):
+    """
+    util.get_displays()的异步版本。
+
+    异常:
+        subprocess.CalledProcessError: 如果执行scrcpy --list-displays命令失败，则抛出该异常。
+        asyncio.TimeoutError: 超过PROBE_TIMEOUT仍未完成。
+        runner.ProbeCancelled: 被取消。
+    """
+    device_id = util.current_serial(device_id)
+
+    async def load(token):
+        try:
+            if displays := util.parse_dumpsys_displays(await shell(device_id, util.DISPLAY_DUMP_COMMAND, PROBE_TIMEOUT)):
+                return displays
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, adb_client.AdbError):
+            pass
+
+        return util.parse_displays(await list_output('--list-displays', device_id, PROBE_TIMEOUT, token, check=True))
+
+    displays = await cached_capability(device_id, 'displays', load, cancel_token)
+    return [dict(display) for display in displays]
+
+
+async def get_display_ids(device_id=None, cancel_token=None):
+    """util.get_display_ids()的异步版本。"""
+    return [display['id'] for display in await get_displays(device_id, cancel_token)]
+
+
+async def get_camera_sizes(device_id=None, cancel_token=None, on_camera=None):
+    """
+    util.get_camera_sizes()的异步版本。探测时边运行边解析输出，每个摄像头的信息完整后立即调用on_camera。
+
+    参数:
+        on_camera (callable, optional): on_camera(camera_id, camera)，在事件循环线程中调用。
+                                        命中缓存时不调用，同一摄像头只调用一次。
+
+    异常:
+        asyncio.TimeoutError: 超过CAMERA_PROBE_TIMEOUT仍未完成。
+        runner.ProbeCancelled: 被取消。
+    """
+    device_id = util.current_serial(device_id)
+
+    async def load(token):
+        parser = util.CameraSizesParser()
+        reported = set()
+
+        def report(camera):
+            if camera and on_camera and camera[0] not in reported:
+                reported.add(camera[0])
+                on_camera(*camera)
+
+        # 退回scrcpy客户端时列表会从头再输出一遍，换用新的解析器，已回调过的摄像头不再重复回调
+        def on_line(line):
+            nonlocal parser
+            if 'INFO: List of cameras' in line:
+                parser = util.CameraSizesParser()
+            report(parser.feed(line))
+
+        await list_output('--list-camera-sizes', device_id, CAMERA_PROBE_TIMEOUT, token, on_line=on_line)
+        report(parser.close())
+        return parser.cameras
+
+    return await cached_capability(device_id, 'cameras', load, cancel_token)
+
+
+async def get_encoders(device_id=None, cancel_token=None):
+    """
+    util.get_encoders()的异步版本。
+
+    异常:
+        asyncio.TimeoutError: 超过PROBE_TIMEOUT仍未完成。
+        runner.ProbeCancelled: 被取消。
+    """
+    device_id = util.current_serial(device_id)
+
+    async def load(token):
+        return util.parse_encoders(await list_output('--list-encoders', device_id, PROBE_TIMEOUT, token))
+
+    return await cached_capability(device_id, 'encoders', load, cancel_token)
+
+
+async def restart_adb_server():
+    """util.restart_adb_server()的异步版本。"""
+    adb_client.client.close_sessions()
+    adb_client.client.clear_pool()
+    try:
+        await host_query('host:kill')
+    except (OSError, asyncio.IncompleteReadError, adb_client.AdbError):
+        pass
+    cache.clear()
+    await runner.run_async([ADB, 'start-server'], ADB_SERVER_TIMEOUT)
+    adb_client.client.clear_pool()
+
+
+class LoopThread:
+    """
+    在独立线程中运行的asyncio事件循环。所有异步探测都在这一个线程上并发执行，
+    GUI通过submit()提交协程，并在返回的Future完成后把结果转交回Qt主线程。
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def submit(self, coro):
+        """
+        提交协程。
+
+        返回值:
+            concurrent.futures.Future: 调用其cancel()会取消协程，正在运行的子进程随之被结束。
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+
+def submit(coro):
+    """在共享的LoopThread中执行协程，参见LoopThread.submit()。"""
+    global _loop_thread
+    with _loop_lock:
+        if _loop_thread is None:
+            _loop_thread = LoopThread()
+    return _loop_thread.submit(coro)
@@ -0,0 +1,129 @@
+from typing import NamedTuple
+
+HIGH_SPEED_LABEL = '[高速]'
+# Android自带的软件编码器，其余编码器由芯片厂商提供，视为硬件编码器
+SOFTWARE_ENCODER_PREFIXES = ('c2.android.', 'OMX.google.')
+
+
+class CameraSize(NamedTuple):
+    """
+    摄像头的一种输出分辨率。
+
+    fps为普通模式下的帧率，high_speed_fps为高速模式（--camera-high-speed）下额外可用的帧率。
+    """
+    width: int
+    height: int
+    fps: tuple = ()
+    high_speed_fps: tuple = ()
+
+    @property
+    def high_speed(self):
+        return bool(self.high_speed_fps)
+
+    @property
+    def resolution(self):
+        """scrcpy --camera-size使用的格式，如'1920x1080'"""
+        return f'{self.width}x{self.height}'
+
+    @property
+    def label(self):
+        """下拉框中显示的文字，支持高速模式的分辨率带有HIGH_SPEED_LABEL"""
+        return self.resolution + (HIGH_SPEED_LABEL if self.high_speed else '')
+
+    @property
+    def all_fps(self):
+        return self.fps + self.high_speed_fps
+
+    def needs_high_speed(self, fps):
+        """该帧率是否只能以高速模式获得"""
+        return fps in self.high_speed_fps and fps not in self.fps
+
+
+class Camera:
+    """
+    一个摄像头的能力。sizes按下拉框的显示顺序排列。
+    """
+    __slots__ = ('id', 'facing', 'sizes')
+
+    def __init__(self, camera_id, sizes, facing=None):
+        self.id = camera_id
+        self.facing = facing
+        self.sizes = tuple(sizes)
+
+    def __eq__(self, other):
+        if not isinstance(other, Camera):
+            return NotImplemented
+        return (self.id, self.facing, self.sizes) == (other.id, other.facing, other.sizes)
+
+    def __repr__(self):
+        return f'Camera(id={self.id}, facing={self.facing}, sizes={[size.label for size in self.sizes]})'
+
+    def to_dict(self):
+        """转换为可写入JSON的字典"""
+        return {'id': self.id, 'facing': self.facing,
+                'sizes': [[size.width, size.height, list(size.fps), list(size.high_speed_fps)] for size in self.sizes]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sizes = [CameraSize(width, height, tuple(fps), tuple(high_speed_fps))
+                 for width, height, fps, high_speed_fps in data['sizes']]
+        return cls(data['id'], sizes, data.get('facing'))
+
+
+def guess_encoder_type(name):
+    """scrcpy没有给出编码器类型（2.5及更早版本）时按名称推断，返回'sw'或'hw'。"""
+    return 'sw' if name.startswith(SOFTWARE_ENCODER_PREFIXES) else 'hw'
+
+
+class Encoder(NamedTuple):
+    """
+    设备上的一个编码器。kind为'video'或'audio'；type为'hw'、'sw'或'hybrid'，scrcpy不提供时由guess_encoder_type()推断；
+    alias表示该编码器只是另一个编码器的别名。
+    """
+    kind: str
+    codec: str
+    name: str
+    type: str = None
+    alias: bool = False
+
+    @property
+    def hardware(self):
+        return self.type in ('hw', 'hybrid')
+
+
+class Encoders:
+    """设备的编码器清单，按(kind, codec)建立索引。"""
+    __slots__ = ('encoders', 'by_codec')
+
+    def __init__(self, encoders):
+        self.encoders = tuple(encoders)
+        self.by_codec = {}
+        for encoder in self.encoders:
+            self.by_codec.setdefault((encoder.kind, encoder.codec), []).append(encoder)
+
+    def __eq__(self, other):
+        if not isinstance(other, Encoders):
+            return NotImplemented
+        return self.encoders == other.encoders
+
+    def __bool__(self):
+        return bool(self.encoders)
+
+    def codecs(self, kind):
+        """设备支持的编解码格式，如{'h264', 'h265'}"""
+        return {codec for encoder_kind, codec in self.by_codec if encoder_kind == kind}
+
+    def best(self, kind, codec):
+        """
+        返回该格式下的硬件编码器，hw优先于hybrid，非别名优先；只有软件编码器时返回None，交给scrcpy自行选择。
+        """
+        candidates = [encoder for encoder in self.by_codec.get((kind, codec), []) if encoder.hardware]
+        candidates.sort(key=lambda encoder: (encoder.type != 'hw', encoder.alias))
+        return candidates[0] if candidates else None
+
+    def to_list(self):
+        return [list(encoder) for encoder in self.encoders]
+
+    @classmethod
+    def from_list(cls, data):
+        return cls(Encoder(*encoder) for encoder in data)
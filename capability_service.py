@@ -0,0 +1,162 @@
+"""
+设备能力查询服务，供GUI、命令行与测试脚本共用。
+
+    python capability_service.py                      # 查询所有已连接设备
+    python capability_service.py SERIAL... --keys displays encoders
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+import async_util
+import util
+from consts import *
+from device_cache import cache
+
+# 各项能力的探测协程，参数为设备代号与逐项回调（目前只有摄像头探测会逐个回调）
+PROBES = {
+    'snapshot': lambda serial, on_item: async_util.get_snapshot(serial),
+    'displays': lambda serial, on_item: async_util.get_displays(serial),
+    'cameras': lambda serial, on_item: async_util.get_camera_sizes(serial, on_camera=on_item),
+    'encoders': lambda serial, on_item: async_util.get_encoders(serial),
+}
+DEFAULT_KEYS = ('displays', 'cameras', 'encoders')
+
+
+class _InFlight:
+    """一次正在进行的探测，由所有等待同一设备同一能力的调用方共享。"""
+    __slots__ = ('task', 'waiters', 'listeners', 'items')
+
+    def __init__(self):
+        self.task = None
+        self.waiters = 0
+        self.listeners = []
+        self.items = []
+
+    def dispatch(self, *item):
+        self.items.append(item)
+        for listener in list(self.listeners):
+            listener(*item)
+
+
+class CapabilityService:
+    """
+    设备能力（屏幕、摄像头、编码器、属性快照）的查询服务。
+
+    结果保存在共享的device_cache（内存）与CapabilityStore（磁盘）中，任何调用方探测过的设备其他调用方都可以直接命中。
+    同一设备同一能力的并发查询合并为一次探测：后来的调用方等待已在进行的探测，不会再启动新的scrcpy或shell。
+    某个调用方被取消时只是不再等待，所有调用方都取消后探测本身才被取消，其子进程随之结束。
+
+    所有协程都应在async_util的事件循环中运行（async_util.submit或MainWindow.run_async），同步代码使用query_sync()。
+    """
+
+    def __init__(self):
+        self._inflight = {}
+
+    @staticmethod
+    def peek(serial, key):
+        """返回已缓存的结果，未探测过时返回None，不会触发探测。"""
+        return cache.get(util.current_serial(serial), key)
+
+    async def get(self, serial, key, on_item=None):
+        """
+        查询一台设备的一项能力。
+
+        参数:
+            serial (str): 设备代号。如果为None，则使用当前连接的设备。
+            key (str): 能力名称，须在PROBES中。
+            on_item (callable, optional): 逐项回调，目前只用于摄像头：on_item(camera_id, camera)，在事件循环线程中调用。
+                                          加入已在进行的探测时，先补发已经得到的摄像头。
+
+        返回值:
+            与async_util中对应函数的返回值相同。
+
+        异常:
+            KeyError: 未知的能力名称。
+            以及对应探测函数抛出的异常。
+        """
+        serial = util.current_serial(serial)
+        probe_key = (serial, key)
+        if (probe := self._inflight.get(probe_key)) is None:
+            probe = _InFlight()
+            probe.task = asyncio.ensure_future(PROBES[key](serial, probe.dispatch))
+            self._inflight[probe_key] = probe
+
+            def finished(_):
+                if self._inflight.get(probe_key) is probe:
+                    del self._inflight[probe_key]
+
+            probe.task.add_done_callback(finished)
+
+        if on_item:
+            for item in probe.items:
+                on_item(*item)
+            probe.listeners.append(on_item)
+        probe.waiters += 1
+        try:
+            return await asyncio.shield(probe.task)
+        finally:
+            probe.waiters -= 1
+            if on_item:
+                probe.listeners.remove(on_item)
+            if not probe.waiters and not probe.task.done():
+                # 先移出_inflight，取消生效前到来的调用方会启动新的探测，而不是加入这个已被取消的探测
+                if self._inflight.get(probe_key) is probe:
+                    del self._inflight[probe_key]
+                probe.task.cancel()
+
+    async def query(self, serials, keys=DEFAULT_KEYS, concurrency=CAPABILITY_QUERY_CONCURRENCY):
+        """
+        批量查询多台设备的多项能力，同时探测的设备数不超过concurrency，同一设备的各项能力并发探测。
+
+        返回值:
+            dict: {设备代号: {能力名称: 结果或异常}}，单项失败不影响其他项。
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def query_device(serial):
+            async with semaphore:
+                results = await asyncio.gather(*(self.get(serial, key) for key in keys), return_exceptions=True)
+            return dict(zip(keys, results))
+
+        serials = list(serials)
+        return dict(zip(serials, await asyncio.gather(*(query_device(serial) for serial in serials))))
+
+    def query_sync(self, serials, keys=DEFAULT_KEYS, timeout=None):
+        """query()的同步版本，在共享事件循环中执行并等待结果，不能在事件循环线程中调用。"""
+        return async_util.submit(self.query(serials, keys)).result(timeout)
+
+
+service = CapabilityService()
+
+
+def encode(key, value):
+    """把查询结果转换为可写入JSON的形式，异常转换为{'error': 描述}。"""
+    if isinstance(value, BaseException):
+        return {'error': f'{type(value).__name__}: {value}'}
+    if key == 'snapshot':
+        return {'props': value.props, 'settings': value.settings, 'size': value.size, 'density': value.density}
+    if key == 'displays':
+        return value
+    return util.CAPABILITY_CODECS[key][0](value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='查询设备的屏幕、摄像头与编码器信息，以JSON输出')
+    parser.add_argument('serials', nargs='*', help='设备代号，不指定时查询所有已连接的设备')
+    parser.add_argument('--keys', nargs='+', choices=list(PROBES), default=list(DEFAULT_KEYS), help='查询的能力')
+    args = parser.parse_args(argv)
+
+    serials = args.serials or list(async_util.submit(async_util.devices()).result()[0])
+    if not serials:
+        print('没有已连接的设备', file=sys.stderr)
+        return 1
+    results = service.query_sync(serials, args.keys)
+    print(json.dumps({serial: {key: encode(key, value) for key, value in result.items()}
+                      for serial, result in results.items()}, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,6 +9,41 @@ TOOL_NAME = r'PyQtScrcpy'
 TOOL_AUTHOR = r'bilibili@星间晞'
 DATA_PATH = os.path.join(os.path.expanduser('~'), '.pyqtscrcpy')
 
+PROBE_TIMEOUT = 20  # 设备探测命令（如scrcpy --list-displays）的默认截止时间（秒）
+CAMERA_PROBE_TIMEOUT = 30  # 摄像头探测需要打开相机服务，给予更长的截止时间（秒）
+ADB_SERVER_TIMEOUT = 15  # 启动adb服务器的截止时间（秒）
+
+DEVICE_NAME_WORKERS = 8  # 并发获取设备名称的最大线程数
+DEVICE_NAME_TIMEOUT = 5  # 获取单个设备名称的超时时间（秒）
+UNKNOWN_DEVICE_NAME = '未知设备'
+ADB_INPUT_RESTRICTED_TIP = '目标设备似乎未解除ADB Input限制，例如“USB调试（安全设置）”。\n在解除此限制前可能无法在PC端对目标设备进行控制'
+
+ADB_HOST = '127.0.0.1'
+ADB_PORT = int(os.environ.get('ANDROID_ADB_SERVER_PORT', 5037))  # 与adb命令行一致，可通过环境变量指定服务器端口
+ADB_POOL_SIZE = 4  # adb服务器连接池保留的空闲连接数
+ADB_SOCKET_TIMEOUT = 10  # 与adb服务器通信的默认超时时间（秒）
+SHELL_SESSION_TIMEOUT = 30  # 常驻shell会话中单条命令的默认超时时间（秒）
+DEVICE_TRACKER_RETRY_INTERVAL = 1  # 设备跟踪连接断开后的重连间隔（秒）
+WIRELESS_ADB_PORT = 5555
+WIRELESS_SCAN_LOCAL_SUBNET = True  # 无线发现时是否同时扫描本机所在的/24网段
+WIRELESS_PROBE_TIMEOUT = 0.5  # 扫描网段时单个主机的连接超时（秒）
+WIRELESS_SCAN_CONCURRENCY = 128  # 扫描网段的最大并发连接数
+WIRELESS_CONNECT_CONCURRENCY = 8  # 同时进行的adb connect数量
+WIRELESS_CONNECT_TIMEOUT = 10
+WIRELESS_MDNS_TIMEOUT = 10
+DEVICE_CACHE_TTL = None  # 设备元数据缓存的过期时间（秒），None表示只在设备断开或状态变化时失效
+SELECTION_DEBOUNCE_MS = 250  # 设备选择停止变化多久后才开始探测（毫秒），连续切换时只探测最终选中的设备
+CAPABILITY_STORE_PATH = os.path.join(DATA_PATH, 'capabilities.json')  # 按设备与系统指纹保存的屏幕、摄像头信息
+CAPABILITY_QUERY_CONCURRENCY = 8  # 批量查询设备能力时同时探测的最大设备数
+STANDBY_WAKE_INTERVAL = 10  # 热备期间重新唤醒设备的间隔（秒），需小于设备的自动锁屏时间
+LAUNCH_LOG_PATH = os.path.join(DATA_PATH, 'launches.jsonl')  # 每次启动的各阶段耗时，用于统计分位数
+LAUNCH_HISTORY_SIZE = 500  # 计算启动耗时分位数时使用的最近启动次数
+LAUNCH_OUTPUT_TAIL = 50  # scrcpy异常退出时保留用于提示的最后几行输出
+SESSION_STOP_TIMEOUT = 5  # 停止会话时等待scrcpy正常退出的时间（秒），超时后强制结束
+SESSION_SAMPLE_INTERVAL_MS = 1000  # 会话列表刷新与采样CPU、内存的间隔（毫秒）
+LAUNCH_CONCURRENCY = 4  # 同时投屏多台设备时，同时处于启动阶段的最大会话数
+LAUNCH_SLOT_TIMEOUT = 30  # 会话超过该时间（秒）仍未完成启动时不再占用启动名额
+
 
 try:
     if os.path.isdir(os.path.join(os.path.dirname(__file__), 'bin')):
@@ -27,6 +62,14 @@ try:
 except Exception:
     pass
 
+# 可通过环境变量替换为simulator/bin中的模拟程序，用于在没有真机的环境中测试
+ADB = os.environ.get('PYQTSCRCPY_ADB', ADB)
+SCRCPY = os.environ.get('PYQTSCRCPY_SCRCPY', SCRCPY)
+# 与scrcpy一致，可通过环境变量SCRCPY_SERVER_PATH指定scrcpy-server的位置
+SCRCPY_SERVER = os.environ.get('SCRCPY_SERVER_PATH', os.path.join(BASEDIR, 'scrcpy-server'))
+# 探测时直接启动的server副本，与scrcpy自己推送的scrcpy-server.jar分开存放，避免被镜像会话覆盖或删除
+SCRCPY_SERVER_DEVICE_PATH = '/data/local/tmp/pyqtscrcpy-server.jar'
+
 if 'Windows' in platform.system():
     CREATE_NEW_CONSOLE = subprocess.CREATE_NEW_CONSOLE
     CREATE_NO_WINDOW = subprocess.CREATE_NO_WINDOW
@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+import time
+
+from consts import *
+
+_MISSING = object()
+
+
+class DeviceCache:
+    """
+    按设备代号缓存设备元数据（名称、型号、屏幕列表、摄像头分辨率等）。
+
+    设备保持连接期间这些信息基本不会变化，因此只在设备断开或状态变化时显式失效；也可以设置TTL让条目自动过期。
+    """
+
+    def __init__(self, ttl=DEVICE_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def get(self, serial, key, default=None):
+        with self._lock:
+            entry = self._entries.get(serial, {}).get(key)
+        if entry is None:
+            return default
+        value, expires = entry
+        if expires is not None and time.monotonic() >= expires:
+            return default
+        return value
+
+    def set(self, serial, key, value, ttl=_MISSING):
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries.setdefault(serial, {})[key] = (value, expires)
+
+    def get_or_load(self, serial, key, loader, ttl=_MISSING, timeout=None):
+        """
+        读取缓存，未命中时调用loader()加载并写入缓存。同一条目的并发加载只执行一次loader()，其余调用方等待其结果。
+
+        参数:
+            serial (str): 设备代号。为None时无法确定设备，直接调用loader()且不缓存。
+            key (str): 元数据名称。
+            loader (callable): 无参加载函数，抛出异常时不写入缓存。
+            ttl (float, optional): 本条目的过期时间（秒），默认使用self.ttl，None表示不过期。
+            timeout (float, optional): 等待其他调用方加载同一条目的最长时间（秒），None表示一直等待。
+
+        返回值:
+            loader()的返回值或缓存值。
+
+        异常:
+            TimeoutError: 超过timeout其他调用方仍未加载完成。
+        """
+        if serial is None:
+            return loader()
+        value = self.get(serial, key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            loading = self._loading.setdefault((serial, key), threading.Lock())
+        if not loading.acquire(timeout=-1 if timeout is None else timeout):
+            raise TimeoutError(f'等待加载{serial}的{key}超时')
+        try:
+            value = self.get(serial, key, _MISSING)
+            if value is _MISSING:
+                value = loader()
+                self.set(serial, key, value, ttl)
+        finally:
+            loading.release()
+        return value
+
+    def invalidate(self, serial, key=None):
+        """使某设备的全部缓存（或指定条目）失效。"""
+        with self._lock:
+            if key is None:
+                self._entries.pop(serial, None)
+            else:
+                self._entries.get(serial, {}).pop(key, None)
+
+    def retain(self, serials):
+        """只保留给定设备的缓存，其余设备视为已断开。"""
+        with self._lock:
+            for serial in self._entries.keys() - set(serials):
+                del self._entries[serial]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class CapabilityStore:
+    """
+    磁盘上的设备能力缓存（DATA_PATH/capabilities.json），保存解析后的屏幕与摄像头信息。
+
+    键为设备代号+ro.build.fingerprint，系统更新后指纹变化，旧条目自然失效。
+    读取到的条目可以立即使用，再由调用方在后台重新验证；验证结果与缓存不同时通知listeners。
+    """
+
+    def __init__(self, path=CAPABILITY_STORE_PATH):
+        self.path = path
+        self.listeners = []
+        self._data = None
+        self._revalidated = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(serial, fingerprint):
+        return f'{serial}|{fingerprint}'
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def get(self, serial, fingerprint, key):
+        with self._lock:
+            return self._load().get(self._key(serial, fingerprint), {}).get(key)
+
+    def set(self, serial, fingerprint, key, value):
+        with self._lock:
+            data = self._load()
+            entry = data.setdefault(self._key(serial, fingerprint), {})
+            if entry.get(key) == value:
+                return
+            # 同一设备只保留当前指纹的条目
+            for stale in [k for k in data if k.startswith(f'{serial}|') and k != self._key(serial, fingerprint)]:
+                del data[stale]
+            entry[key] = value
+            entry['updated'] = int(time.time())
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def should_revalidate(self, serial, fingerprint, key):
+        """每个条目在本次运行中只重新验证一次。"""
+        with self._lock:
+            token = (serial, fingerprint, key)
+            if token in self._revalidated:
+                return False
+            self._revalidated.add(token)
+            return True
+
+    def revalidated(self, serial, fingerprint, key, value, changed):
+        self.set(serial, fingerprint, key, value)
+        if changed:
+            for listener in self.listeners:
+                listener(serial, key)
+
+
+cache = DeviceCache()
+store = CapabilityStore()
@@ -0,0 +1,76 @@
+import subprocess
+import threading
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+import adb_client
+from consts import *
+from device_cache import cache
+
+
+class DeviceTracker(QObject):
+    """
+    后台保持一条host:track-devices长连接，把adb服务器推送的设备列表转换为增量的Qt信号。
+
+    信号:
+        device_added(serial, state): 新设备出现。
+        device_removed(serial): 设备断开。
+        device_state_changed(serial, state): 设备状态变化（如unauthorized -> device）。
+    """
+    device_added = pyqtSignal(str, str)
+    device_removed = pyqtSignal(str)
+    device_state_changed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None, client=None):
+        super().__init__(parent)
+        self.client = client or adb_client.client
+        self.states = {}
+        self._conn = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._conn:
+            self._conn.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                try:
+                    self._conn = self.client.track_devices()
+                except ConnectionRefusedError:
+                    self.client.start_server()
+                    self._conn = self.client.track_devices()
+                while not self._stop.is_set():
+                    self._apply(adb_client.parse_device_states(self._conn.read_hex_length_data()))
+            except (OSError, subprocess.SubprocessError, adb_client.AdbError):
+                # adb服务器重启、断开或未能按时启动，稍后重连；重连后的首个列表会与已知状态对比，得到正确的增量
+                pass
+            finally:
+                if self._conn:
+                    self._conn.close()
+                    self._conn = None
+            self._stop.wait(DEVICE_TRACKER_RETRY_INTERVAL)
+
+    def _apply(self, states):
+        previous, self.states = self.states, states
+        for serial in previous.keys() - states.keys():
+            cache.invalidate(serial)
+            self.client.close_session(serial)
+            self.device_removed.emit(serial)
+        for serial, state in states.items():
+            if serial not in previous:
+                cache.invalidate(serial)
+                self.device_added.emit(serial, state)
+            elif previous[serial] != state:
+                cache.invalidate(serial)
+                self.client.close_session(serial)
+                self.device_state_changed.emit(serial, state)
@@ -0,0 +1,213 @@
+"""
+启动耗时统计：按scrcpy输出的日志给每次启动的各阶段打时间戳，并统计各阶段耗时的分位数。
+
+    python launch_metrics.py                  # 统计DATA_PATH/launches.jsonl中的最近启动
+    python launch_metrics.py --serial SERIAL
+"""
+import argparse
+import collections
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+
+from consts import *
+
+# 阶段名称与标志该阶段完成的日志，按出现顺序排列；spawn为scrcpy输出的第一行，即进程已经启动
+PHASES = (
+    ('spawn', '进程启动', re.compile(r'^scrcpy \S+')),
+    ('push', '推送server', re.compile(r'\d+ files? pushed')),
+    ('server', '设备端server启动', re.compile(r'\[server\] INFO: Device:')),
+    ('connected', '建立连接', re.compile(r'INFO: Renderer:')),
+    ('first_frame', '首帧', re.compile(r'INFO: Texture:')),
+    ('recording', '开始录制', re.compile(r'INFO: Recording started')),
+)
+PHASE_LABELS = {name: label for name, label, _ in PHASES}
+
+
+def percentile(values, p):
+    """最近秩法计算分位数，values为空时返回None。"""
+    values = sorted(values)
+    if not values:
+        return None
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+class LaunchTimeline:
+    """
+    一次启动的时间线，各阶段的耗时从点击启动（创建对象）时算起，单位为秒。
+
+    属性:
+        serial (str): 设备代号。
+        args (list): scrcpy参数。
+        phases (dict): 已完成的阶段及其耗时。
+        expected (tuple): 按参数应当出现的阶段，全部出现后视为启动完成。
+        returncode (int): 启动完成前scrcpy就已退出时的返回码，否则为None。
+    """
+
+    def __init__(self, serial, args):
+        self.serial = serial
+        self.args = list(args)
+        self.timestamp = time.time()
+        self.started = time.monotonic()
+        self.phases = {}
+        self.returncode = None
+        playback = not any(arg in ('--no-playback', '--no-video', '--no-window') for arg in self.args)
+        recording = any(arg.startswith(('--record', '-r')) for arg in self.args)
+        self.expected = tuple(name for name, _, _ in PHASES
+                              if (name not in ('connected', 'first_frame') or playback)
+                              and (name != 'recording' or recording))
+
+    def feed(self, line, now=None):
+        """
+        处理一行输出。
+
+        返回值:
+            str: 该行标志完成的阶段名称，没有时为None。
+        """
+        for name, _, pattern in PHASES:
+            if name not in self.phases and pattern.search(line):
+                self.phases[name] = (now or time.monotonic()) - self.started
+                return name
+        return None
+
+    @property
+    def complete(self):
+        return all(name in self.phases for name in self.expected)
+
+    @property
+    def total(self):
+        """启动完成时为最后一个阶段的耗时，否则为None。"""
+        return max(self.phases.values()) if self.complete else None
+
+    def summary(self):
+        """
+        已完成阶段的耗时。启动完成时如'共 1.82s（进程启动 0.05s、推送server 0.31s、…、首帧 1.82s）'，
+        否则只列出已完成的阶段，如'进程启动 0.05s、推送server 0.31s'。
+        """
+        parts = '、'.join(f'{PHASE_LABELS[name]} {seconds:.2f}s' for name, seconds in self.phases.items())
+        return f'共 {self.total:.2f}s（{parts}）' if self.complete else parts
+
+    def to_dict(self):
+        return {'serial': self.serial, 'args': self.args, 'timestamp': int(self.timestamp),
+                'phases': {name: round(seconds, 3) for name, seconds in self.phases.items()},
+                'returncode': self.returncode}
+
+
+class LaunchMetrics:
+    """
+    最近LAUNCH_HISTORY_SIZE次启动的时间线，每次启动同时追加到path（JSON Lines），重新运行程序后统计仍然连续。
+    """
+
+    def __init__(self, path=LAUNCH_LOG_PATH, size=LAUNCH_HISTORY_SIZE):
+        self.path = path
+        self.size = size
+        self._history = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._history is None:
+            self._history = collections.deque(maxlen=self.size)
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            self._history.append(json.loads(line))
+                        except ValueError:
+                            pass
+            except OSError:
+                pass
+        return self._history
+
+    def record(self, timeline):
+        entry = timeline.to_dict()
+        with self._lock:
+            self._load().append(entry)
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            except OSError:
+                pass
+
+    def history(self, serial=None):
+        with self._lock:
+            return [entry for entry in self._load() if serial is None or entry['serial'] == serial]
+
+    def summary(self, serial=None, percentiles=(50, 90, 99)):
+        """
+        各阶段耗时的分位数。
+
+        返回值:
+            dict: {阶段名称: {'count': 次数, 'p50': 秒, ...}}，只包含出现过的阶段。
+        """
+        history = self.history(serial)
+        result = {}
+        for name, _, _ in PHASES:
+            values = [entry['phases'][name] for entry in history if name in entry['phases']]
+            if values:
+                result[name] = {'count': len(values), **{f'p{p}': percentile(values, p) for p in percentiles}}
+        return result
+
+
+metrics = LaunchMetrics()
+
+
+def watch(proc, timeline, on_complete=None, on_exit=None):
+    """
+    在后台线程中逐行读取scrcpy的输出（proc须以文本模式打开stdout），给时间线打时间戳并记录到metrics。
+
+    启动完成（或启动完成前进程就已退出）时记录一次。回调在读取线程中调用。
+
+    参数:
+        proc (subprocess.Popen): scrcpy进程，stderr应合并到stdout。
+        timeline (LaunchTimeline): 本次启动的时间线。
+        on_complete (callable, optional): on_complete(timeline)，启动完成时调用。
+        on_exit (callable, optional): on_exit(returncode, output)，进程退出时调用，output为最后LAUNCH_OUTPUT_TAIL行输出。
+
+    返回值:
+        threading.Thread: 读取线程。
+    """
+    def read():
+        output = collections.deque(maxlen=LAUNCH_OUTPUT_TAIL)
+        recorded = False
+        for line in proc.stdout:
+            output.append(line)
+            if timeline.feed(line) and not recorded and timeline.complete:
+                recorded = True
+                metrics.record(timeline)
+                if on_complete:
+                    on_complete(timeline)
+        returncode = proc.wait()
+        if not recorded:
+            timeline.returncode = returncode
+            metrics.record(timeline)
+        if on_exit:
+            on_exit(returncode, ''.join(output))
+
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='统计scrcpy启动各阶段耗时的分位数')
+    parser.add_argument('--serial', help='只统计该设备')
+    parser.add_argument('--log', default=LAUNCH_LOG_PATH, help='启动记录文件')
+    args = parser.parse_args(argv)
+
+    summary = LaunchMetrics(args.log).summary(args.serial)
+    if not summary:
+        print('没有启动记录', file=sys.stderr)
+        return 1
+    print(f"{'阶段':<12}{'次数':>6}{'p50':>9}{'p90':>9}{'p99':>9}")
+    for name, stats in summary.items():
+        print(f"{PHASE_LABELS[name]:<12}{stats['count']:>6}{stats['p50']:>8.2f}s{stats['p90']:>8.2f}s{stats['p99']:>8.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,21 +1,29 @@
+import asyncio
 import datetime
 import os
 import platform
 import sys
 import re
-import subprocess
 import threading
 import traceback
 
 from PyQt5 import QtGui
-from PyQt5.QtCore import pyqtSignal, QPropertyAnimation, QSize, QEasingCurve, Qt, QTranslator, QLocale
+from PyQt5.QtCore import pyqtSignal, QPropertyAnimation, QSize, QEasingCurve, Qt, QTranslator, QLocale, QTimer
 from PyQt5.QtWidgets import QApplication, QWidget, QFileDialog
 from qfluentwidgets import MessageBox
 from qframelesswindow import AcrylicWindow, StandardTitleBar, FramelessWindow
 
+import async_util
 import util
+import wireless
+from capability_service import service
 from consts import *
+from device_cache import store
+from device_tracker import DeviceTracker
 from info_bar import info_bar
+from session_window import SessionWindow
+from sessions import supervisor
+from standby import standby
 from mainWindow import Ui_Form
 from cmosui import tip
 
@@ -40,6 +48,7 @@ class MainWindow(FramelessWindow if 'Windows-10' in platform.platform() else Acr
     infoBar = pyqtSignal(str, str, str, int)
     error_signal = pyqtSignal(str)
     refresh_signal = pyqtSignal()
+    invoke_signal = pyqtSignal(object)
     slide_pro_page = pyqtSignal(QWidget)
 
     def __init__(self):
@@ -47,6 +56,12 @@ class MainWindow(FramelessWindow if 'Windows-10' in platform.platform() else Acr
         self.pro_mode = False
         self.setTitleBar(titleBar(self))
         self.camera_info = None
+        self.encoders = None
+        self.probe_futures = []
+        self.probe_generation = 0
+        self.camera_generation = None
+        self.probed_serial = None
+        self.pro_page_loading = False
         self.video_source = 'screen'
         self.setupUi(self)
         self.resize(self.minimumWidth(), self.height())
@@ -83,11 +98,16 @@ class MainWindow(FramelessWindow if 'Windows-10' in platform.platform() else Acr
 
         self.get_devices_btn.clicked.connect(self.get_devices)
         self.restart_adb_btn.clicked.connect(self.restart_adb)
+        self.wireless_scan_btn.clicked.connect(self.discover_wireless_devices)
         self.camera_ids.currentIndexChanged.connect(self.on_camera_id_change)
+        self.video_codec_buttons = {'h264': self.video_h264, 'h265': self.video_h265, 'av1': self.video_av1}
+        self.audio_codec_buttons = {'opus': self.audio_opus, 'aac': self.audio_aac, 'flac': self.audio_flac}
         self.camera_sizes.currentIndexChanged.connect(self.on_camera_size_change)
         self.choice_record_output_path.clicked.connect(
             lambda: self.record_output_path.setText(QFileDialog.getExistingDirectory(self, '选择保存路径')))
         self.run_scrcpy.clicked.connect(self.run)
+        self.session_window = None
+        self.sessions_btn.clicked.connect(self.show_sessions)
         self.install_pyqtscrcpy.clicked.connect(
             lambda: tip(self, self.install_pyqtscrcpy, '这个功能还没做完', '', 'Warning', True, 5000))
         self.abort_pyqtscrcpy.clicked.connect(
@@ -106,9 +126,25 @@ class MainWindow(FramelessWindow if 'Windows-10' in platform.platform() else Acr
 
         self.error_signal.connect(self.on_error)
         self.refresh_signal.connect(self.refresh_pro_page)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(SELECTION_DEBOUNCE_MS)
+        self.refresh_timer.timeout.connect(self.refresh_signal.emit)
+        self.refresh_timer.timeout.connect(self.update_standby)
+        self.hot_standby.stateChanged.connect(self.update_standby)
         self.slide_pro_page.connect(lambda w: self.pro_page_stacked.slideInWgt(w))
+        self.invoke_signal.connect(lambda fn: fn())
+
+        self.device_tracker = DeviceTracker(self)
+        self.device_tracker.device_added.connect(self.on_device_state_changed)
+        self.device_tracker.device_state_changed.connect(self.on_device_state_changed)
+        self.device_tracker.device_removed.connect(self.remove_device_item)
+        self.device_tracker.start()
+        store.listeners.append(lambda serial, key: self.invoke_signal.emit(lambda: self.on_capability_changed(serial)))
 
     def run(self):
+        serials = self.selected_serials() or [None]
+        video_codec = None
         args = []
         if self.stay_awake.isChecked():
             args.append('--stay-awake')
@@ -122,7 +158,7 @@ class MainWindow(FramelessWindow if 'Windows-10' in platform.platform() else Acr
             if not os.path.isdir(self.record_output_path.text()):
                 tip(self, self.record_output_path, '请选择保存路径', '', 'Error', True, 5000)
                 return
-            args.append(f'--record="{self.record_output_path.text()}"')
+            args.append(f'--record={self.record_output_path.text()}')
             if self.record_time_limit.isChecked():
                 if seconds := util.time_to_seconds(self.record_limit_edit.text()):
                     args.append(f'--time-limit={seconds}')
@@ -146,16 +182,18 @@ class MainWindow(FramelessWindow if 'Windows-10' in platform.platform() else Acr
                     if self.enable_max_size.isChecked():
                         args.append(f'--max-size={self.max_size.text()}')
                 elif self.video_source == 'camera':
+                    # 摄像头信息按需探测，尚未加载完成或探测失败时下拉框为空
+                    camera_size = self.current_camera_size()
+                    if camera_size is None or not self.camera_fps.currentText().isdigit():
+                        tip(self, self.camera_ids, '摄像头信息尚未获取，请稍候或重新选择设备', '', 'Warning', True, 5000)
+                        return
                     args.append('--video-source=camera')
                     args.append(f'--camera-id={self.camera_ids.currentText()}')
-                    args.append(f'--camera-size={self.camera_sizes.currentText().replace('[高速]', '')}')
+                    args.append(f'--camera-size={camera_size.resolution}')
                     args.append(f'--camera-fps={self.camera_fps.currentText()}')
-                if self.video_h264.isChecked():
-                    args.append('--video-codec=h264')
-                elif self.video_h265.isChecked():
-                    args.append('--video-codec=h265')
-                elif self.video_av1.isChecked():
-                    args.append('--video-codec=av1')
+                    if camera_size.needs_high_speed(int(self.camera_fps.currentText())):
+                        args.append('--camera-high-speed')
+                video_codec = self.checked_codec(self.video_codec_buttons)
                 args.append(f'--video-bit-rate={util.convert_bitrate(self.video_bit.text())}')
             else:
                 args.append('--no-video')
@@ -166,46 +204,212 @@ class MainWindow(FramelessWindow if 'Windows-10' in platform.platform() else Acr
                 elif self.audio_source_mic.isChecked():
                     args.append('--audio-source=mic')
                 args.append(f'--audio-buffer={self.audio_buffer.text()}')
-                if self.audio_opus.isChecked():
-                    args.append('--audio-codec=opus')
-                elif self.audio_aac.isChecked():
-                    args.append('--audio-codec=aac')
-                elif self.audio_flac.isChecked():
-                    args.append('--audio-codec=flac')
+                if audio_codec := self.checked_codec(self.audio_codec_buttons):
+                    args.append(f'--audio-codec={audio_codec}')
                 args.append(f'--audio-bit-rate={util.convert_bitrate(self.audio_bit.text())}')
             else:
                 args.append('--no-audio')
 
         if self.enable_cust_port.isChecked():
+            if len(serials) > 1:
+                tip(self, self.cust_port, '同时投屏多台设备时不能使用自定义端口', '', 'Error', True, 5000)
+                return
             args.append(f'--tunnel-port={self.cust_port.text()}')
 
         if self.tcpip_connect.isChecked():
             args.append('--tcpip')
 
-        args, invalid_args = util.check_args(args)
-        if 'Windows' in platform.system():
-            cmd = f'start cmd /c "{SCRCPY} {" ".join(args)} || echo. & echo.\033[31m\033[1m---Scrcpy进程已结束 按任意键关闭窗口---\033[0m & pause>nul"'
-        else:
-            cmd = f'{SCRCPY} {" ".join(args)}'
-
-        status = subprocess.getoutput(f'{ADB} shell getprop persist.security.adbinput')
-        if '0' in status:
-            w = MessageBox('所需设置项未启用', '目标设备似乎未解除ADB Input限制，例如“USB调试（安全设置）”。\n在解除此限制前可能无法在PC端对目标设备进行控制', self)
+        # ADB Input限制取自设备属性快照，选中设备时已预取；尚未取得时不等待，先启动scrcpy，检查完成后再提示
+        restricted = []
+        for serial in serials:
+            if (snapshot := service.peek(serial, 'snapshot')) is None:
+                self.run_async(service.get(serial, 'snapshot'),
+                               lambda snapshot, serial=serial: self.check_adb_input(serial, snapshot), lambda e: None)
+            elif snapshot.adb_input_restricted:
+                restricted.append(serial)
+        if restricted:
+            content = ADB_INPUT_RESTRICTED_TIP if len(serials) == 1 else f'{ADB_INPUT_RESTRICTED_TIP}\n{"、".join(restricted)}'
+            w = MessageBox('所需设置项未启用', content, self)
             w.cancelButton.hide()
             w.yesButton.setText('确认')
             w.exec()
 
-        subprocess.Popen(cmd, shell=True, creationflags=CREATE_NEW_CONSOLE, cwd=BASEDIR)
+        # 每台设备一个scrcpy会话，由会话管理器以各自的--serial并行启动并跟踪，同时处于启动阶段的会话数受限
+        jobs = []
+        for serial in serials:
+            device_args = list(args)
+            if video_codec:
+                device_args.extend(self.video_codec_args(serial, video_codec))
+            if self.hot_standby.isChecked() and not self.enable_cust_port.isChecked():
+                device_args.extend(standby.take(serial))
+            jobs.append((serial, util.check_args(device_args)[0]))
+        supervisor.launch(jobs,
+                          on_complete=lambda session: self.invoke_signal.emit(lambda: self.on_launch_complete(session)),
+                          on_exit=lambda session: self.invoke_signal.emit(lambda: self.on_scrcpy_exit(session)),
+                          on_error=lambda serial, e: self.invoke_signal.emit(lambda: self.on_launch_error(serial, e)))
+        # 预留的端口已交给本次会话，为下一次启动重新准备
+        self.update_standby()
+
+    def selected_serials(self):
+        """按列表顺序返回选中的设备代号"""
+        rows = sorted(self.adb_devices.row(item) for item in self.adb_devices.selectedItems())
+        return [self.adb_devices.item(row).text().split(" | ")[-1] for row in rows]
+
+    def current_serial(self):
+        """高级页面展示与探测的设备，多选时为列表中的第一台"""
+        return next(iter(self.selected_serials()), None)
+
+    def video_codec_args(self, serial, codec):
+        """当前设备使用已探测的编码器清单，其他设备使用缓存中的清单，没有清单时交给scrcpy自行选择编码器"""
+        encoders = self.encoders if serial == self.current_serial() else service.peek(serial, 'encoders')
+        encoder = None
+        if self.auto_encoder.isChecked() and encoders:
+            codec, encoder = self.pick_video_encoder(encoders, codec)
+        return [f'--video-codec={codec}'] + ([f'--video-encoder={encoder.name}'] if encoder else [])
+
+    def on_launch_complete(self, session):
+        self.infoBar.emit('投屏已启动', session.timeline.summary(), 'o', 5000)
+
+    def on_launch_error(self, serial, e):
+        self.infoBar.emit(f'无法启动投屏（{serial or "默认设备"}）', str(e), 'e', 8000)
+
+    def on_scrcpy_exit(self, session):
+        if session.returncode and not session.stopped:
+            lines = [line for line in session.output.splitlines() if line.strip()]
+            self.infoBar.emit(f'投屏异常结束（{session.serial or "默认设备"}）', '\n'.join(lines[-3:]), 'e', 8000)
+
+    def show_sessions(self):
+        if self.session_window is None:
+            self.session_window = SessionWindow(self)
+        self.session_window.show()
+        self.session_window.raise_()
+
+    def check_adb_input(self, serial, snapshot):
+        if snapshot.adb_input_restricted:
+            self.infoBar.emit(f'所需设置项未启用（{serial or "默认设备"}）', ADB_INPUT_RESTRICTED_TIP, 'w', 8000)
+
+    def update_standby(self):
+        """热备只针对当前选中的设备，切换设备或关闭热备时解除其他设备的热备"""
+        serial = self.current_serial() if self.hot_standby.isChecked() else None
+
+        def failed(e):
+            self.infoBar.emit('热备失败', f'无法为设备{serial}完成启动准备：{e}', 'w', 5000)
+
+        self.run_async(standby.switch(serial), errback=failed)
+
+    def prefetch_snapshot(self):
+        """预取选中设备的属性快照，结果按设备缓存，设备重新连接后失效；失败时留到启动时再检查"""
+        for serial in self.selected_serials():
+            if service.peek(serial, 'snapshot') is None:
+                self.run_async(service.get(serial, 'snapshot'), errback=lambda e: None)
+
+    def run_async(self, coro, callback=None, errback=None):
+        """
+        在共享的asyncio事件循环中执行协程，完成后在GUI线程调用callback(result)。
+        出错时调用errback(exception)，未指定errback则交给custom_except_hook处理。
+
+        返回值:
+            concurrent.futures.Future: 可用于取消协程。
+        """
+        def done(future):
+            if future.cancelled():
+                return
+            if (e := future.exception()) is None:
+                if callback:
+                    self.invoke_signal.emit(lambda: callback(future.result()))
+            elif errback:
+                self.invoke_signal.emit(lambda: errback(e))
+            else:
+                self.invoke_signal.emit(lambda: self.custom_except_hook(type(e), e, e.__traceback__))
+
+        future = async_util.submit(coro)
+        future.add_done_callback(done)
+        return future
+
+    def cancel_probes(self):
+        """取消仍在进行的探测，其子进程随之被结束；已经排队等待回调的旧结果按代号丢弃"""
+        for future in self.probe_futures:
+            future.cancel()
+        self.probe_futures = []
+        self.probe_generation += 1
 
     def refresh_pro_page(self):
+        self.cancel_probes()
         self.slide_pro_page.emit(self.refresh_page)
+        self.pro_page_loading = True
+        self.camera_generation = None
+        self.camera_info = {}
+        for combo in (self.camera_ids, self.camera_sizes, self.camera_fps):
+            combo.clear()
+        self.load_encoders(None)
+
+        self.start_probe(service.get(self.current_serial(), 'displays'), self.load_screens, '屏幕', self.target_screen)
+        self.start_probe(service.get(self.current_serial(), 'encoders'), self.load_encoders, '编码器')
+        # 摄像头探测代价最高且会唤醒相机HAL，只在视频源为摄像头时进行，切换到摄像头时再补上
+        if self.video_source == 'camera':
+            self.probe_cameras()
+
+    def probe_cameras(self):
+        """探测当前设备的摄像头，同一次刷新内只进行一次；结果按设备缓存，再次选中该设备时直接命中"""
+        if self.camera_generation == self.probe_generation:
+            return
+        self.camera_generation = generation = self.probe_generation
 
-        def _():
-            self.load_camera_ids()
-            self.load_screen_ids()
-            self.slide_pro_page.emit(self.main_pro_page)
+        # 在事件循环线程中调用：每个摄像头解析完成后立即加入下拉框，第一个完成时即可选择
+        def camera_found(camera_id, camera):
+            def add():
+                if generation != self.probe_generation:
+                    return
+                self.add_camera(camera_id, camera)
+                self.probe_loaded(self.camera_ids)
+            self.invoke_signal.emit(add)
+
+        self.start_probe(service.get(self.current_serial(), 'cameras', on_item=camera_found),
+                         self.load_camera_ids, '摄像头', self.camera_ids)
+
+    def start_probe(self, coro, load, name, combo=None):
+        """
+        执行一项探测，完成后调用load(result)填充界面。各项探测并发进行，互不等待。
+
+        参数:
+            coro (coroutine): 探测协程。
+            load (callable): 填充界面的函数。
+            name (str): 探测内容的名称，用于超时提示。
+            combo (ComboBox, optional): 探测期间显示加载状态的下拉框。
+        """
+        generation = self.probe_generation
+        if combo:
+            combo.clear()
+            combo.setText('加载中...')
+            combo.setDisabled(True)
+
+        def loaded(result):
+            if generation != self.probe_generation:
+                return
+            load(result)
+            if combo:
+                self.probe_loaded(combo)
+
+        def failed(e):
+            if generation != self.probe_generation:
+                return
+            if combo:
+                if not combo.count():
+                    combo.setText('')
+                self.probe_loaded(combo)
+            if isinstance(e, asyncio.TimeoutError):
+                self.infoBar.emit('设备响应超时', f'获取{name}信息超时，请检查设备状态', 'w', 5000)
+            else:
+                self.custom_except_hook(type(e), e, e.__traceback__)
 
-        threading.Thread(target=_, daemon=True).start()
+        self.probe_futures.append(self.run_async(coro, loaded, failed))
+
+    def probe_loaded(self, combo):
+        """任意一项探测完成即让页面离开加载状态，仍在进行的探测只体现在各自的下拉框上"""
+        combo.setDisabled(False)
+        if self.pro_page_loading:
+            self.pro_page_loading = False
+            self.slide_pro_page.emit(self.main_pro_page)
 
     def custom_except_hook(self, exc_type, exc_value, exc_traceback):
         if isinstance(exc_value, UnicodeDecodeError) or 'UnicodeDecodeError' in str(exc_value):
@@ -237,32 +441,35 @@ class MainWindow(FramelessWindow if 'Windows-10' in platform.platform() else Acr
         w.exec()
 
     def on_device_selection_changed(self):
-        self.refresh_signal.emit()
-        selected_items = self.adb_devices.selectedItems()
-        if selected_items:
-            selected_device = selected_items[0].text()
-            device_serial = selected_device.split(" | ")[-1]
-            os.environ["ANDROID_SERIAL"] = device_serial
-        else:
-            os.environ.pop("ANDROID_SERIAL", None)
+        # 选中的设备保存在窗口上，不再写入全局的ANDROID_SERIAL，每个会话以各自的--serial启动
+        self.prefetch_snapshot()
+        if self.current_serial() == self.probed_serial:
+            # 多选时追加或取消其他设备，高级页面展示的设备不变，无需重新探测
+            return
+        self.probed_serial = self.current_serial()
+        # 连续切换（如用方向键滚动列表）时被取代的探测立即结束，选择稳定SELECTION_DEBOUNCE_MS后才探测最终选中的设备
+        self.cancel_probes()
+        self.refresh_timer.start()
+
+    def on_capability_changed(self, serial):
+        """磁盘缓存经后台验证发现已过期，内存缓存已更新，当前设备需要重新加载高级页面"""
+        if serial == self.current_serial():
+            self.refresh_signal.emit()
 
     def restart_adb(self):
         self.devices_card.setDisabled(True)
 
-        def _():
-            subprocess.run(f'{ADB} kill-server', shell=True, creationflags=CREATE_NO_WINDOW)
-            subprocess.run(f'{ADB} start-server', shell=True, creationflags=CREATE_NO_WINDOW)
+        def restarted(_):
             self.devices_card.setDisabled(False)
-
             self.get_devices()
 
-        threading.Thread(target=_, daemon=True).start()
+        self.run_async(async_util.restart_adb_server(), restarted, self.on_devices_card_error)
 
     def get_devices(self):
         self.devices_card.setDisabled(True)
 
-        def _():
-            devices, unauthorized_devices, offline_devices = util.devices()
+        def loaded(result):
+            devices, unauthorized_devices, offline_devices = result
             self.adb_devices.clear()
             if devices:
                 self.adb_devices.addItems([f"{name} | {serial}" for serial, name in devices.items()])
@@ -275,7 +482,61 @@ class MainWindow(FramelessWindow if 'Windows-10' in platform.platform() else Acr
                 self.infoBar.emit('未发现设备', '请检查设备是否正常连接', 'e', 5000)
             self.devices_card.setDisabled(False)
 
-        threading.Thread(target=_, daemon=True).start()
+        self.run_async(async_util.devices(), loaded, self.on_devices_card_error)
+
+    def discover_wireless_devices(self):
+        self.wireless_scan_btn.setDisabled(True)
+        subnet = wireless.local_subnet() if WIRELESS_SCAN_LOCAL_SUBNET else None
+
+        def done(results):
+            self.wireless_scan_btn.setDisabled(False)
+            connected = [endpoint for endpoint, (ok, _) in results.items() if ok]
+            if connected:
+                self.infoBar.emit(f'已连接{len(connected)}个无线设备', '、'.join(connected), 'o', 5000)
+            elif results:
+                self.infoBar.emit(f'发现了{len(results)}个无线设备，但均连接失败', '、'.join(results), 'w', 5000)
+            else:
+                self.infoBar.emit('未发现无线设备', '请确认设备已开启无线调试并与电脑处于同一网络', 'e', 5000)
+
+        def failed(e):
+            self.wireless_scan_btn.setDisabled(False)
+            self.custom_except_hook(type(e), e, e.__traceback__)
+
+        self.run_async(wireless.discover_and_connect(subnet), done, failed)
+
+    def on_devices_card_error(self, e):
+        self.devices_card.setDisabled(False)
+        self.custom_except_hook(type(e), e, e.__traceback__)
+
+    def on_device_state_changed(self, serial, state):
+        if state == 'device':
+            self.run_async(async_util.get_device_name(serial), lambda name: self.add_device_item(serial, name))
+            return
+        self.remove_device_item(serial)
+        if state == 'unauthorized':
+            self.infoBar.emit('发现了1个未授权设备', serial, 'w', 5000)
+        elif state == 'offline':
+            self.infoBar.emit('发现了1个离线设备', serial, 'w', 5000)
+
+    def find_device_item(self, serial):
+        for row in range(self.adb_devices.count()):
+            item = self.adb_devices.item(row)
+            if item.text().split(" | ")[-1] == serial:
+                return item
+        return None
+
+    def add_device_item(self, serial, name):
+        if self.device_tracker.states.get(serial) != 'device':
+            return
+        if item := self.find_device_item(serial):
+            item.setText(f"{name} | {serial}")
+        else:
+            self.adb_devices.addItem(f"{name} | {serial}")
+
+    def remove_device_item(self, serial):
+        self.run_async(standby.disarm(serial))
+        if item := self.find_device_item(serial):
+            self.adb_devices.takeItem(self.adb_devices.row(item))
 
     def on_video_source_change(self, item):
         self.video_source = item
@@ -284,30 +545,80 @@ class MainWindow(FramelessWindow if 'Windows-10' in platform.platform() else Acr
         elif item == 'camera':
             self.enable_max_fps.setDisabled(True)
             self.enable_max_fps.setChecked(False)
-
-    def load_screen_ids(self):
+            self.probe_cameras()
+
+    def load_encoders(self, encoders):
+        """禁用设备不支持的编码格式；encoders为None或为空（探测失败）时全部可选"""
+        self.encoders = encoders
+        for kind, buttons in (('video', self.video_codec_buttons), ('audio', self.audio_codec_buttons)):
+            codecs = encoders.codecs(kind) if encoders else set(buttons)
+            for codec, button in buttons.items():
+                button.setDisabled(codec not in codecs)
+            if not self.checked_codec(buttons):
+                for codec, button in buttons.items():
+                    if codec in codecs:
+                        button.setChecked(True)
+                        break
+
+    @staticmethod
+    def checked_codec(buttons):
+        for codec, button in buttons.items():
+            if button.isChecked() and button.isEnabled():
+                return codec
+        return None
+
+    def pick_video_encoder(self, encoders, codec):
+        """
+        按设备的编码器清单为所选格式挑选硬件编码器；该格式只有软件编码器时改用其他有硬件编码器的格式，避免投屏悄悄跑在软件编码器上。
+
+        返回值:
+            tuple: (codec, encoder)，没有任何硬件编码器时encoder为None，交给scrcpy自行选择。
+        """
+        if encoder := encoders.best('video', codec):
+            return codec, encoder
+        for fallback in self.video_codec_buttons:
+            if encoder := encoders.best('video', fallback):
+                self.infoBar.emit('已切换编码格式', f'设备没有{codec}硬件编码器，本次改用{fallback}（{encoder.name}）', 'w', 5000)
+                return fallback, encoder
+        return codec, None
+
+    def load_screens(self, displays):
         self.target_screen.clear()
-        display_ids = util.get_display_ids()
-        self.target_screen.addItems([str(id) for id in display_ids])
+        self.target_screen.addItems([str(display['id']) for display in displays])
 
-    def load_camera_ids(self):
+    def load_camera_ids(self, camera_info):
+        self.camera_info = camera_info
+        camera_ids = [str(id) for id in self.camera_info.keys()]
+        if [self.camera_ids.itemText(i) for i in range(self.camera_ids.count())] == camera_ids:
+            # 探测过程中已由add_camera()逐个填充，保留用户已做的选择
+            return
         self.camera_ids.clear()
-        self.camera_info = util.get_camera_sizes()
-        camera_ids = list(self.camera_info.keys())
-        self.camera_ids.addItems([str(id) for id in camera_ids])
+        self.camera_ids.addItems(camera_ids)
+
+    def add_camera(self, camera_id, camera):
+        self.camera_info[camera_id] = camera
+        if self.camera_ids.findText(str(camera_id)) < 0:
+            self.camera_ids.addItem(str(camera_id))
+
+    def current_camera(self):
+        """选中的摄像头，下拉框为空（尚未探测完成或探测失败）时为None"""
+        camera_id = self.camera_ids.currentText()
+        return self.camera_info.get(int(camera_id)) if camera_id.isdigit() and self.camera_info else None
+
+    def current_camera_size(self):
+        """选中的分辨率，没有选中时为None"""
+        camera, index = self.current_camera(), self.camera_sizes.currentIndex()
+        return camera.sizes[index] if camera and 0 <= index < len(camera.sizes) else None
 
     def on_camera_id_change(self):
-        camera_id = int(self.camera_ids.currentText())
-        sizes = list(self.camera_info[camera_id].keys())
         self.camera_sizes.clear()
-        self.camera_sizes.addItems(sizes)
+        if camera := self.current_camera():
+            self.camera_sizes.addItems([size.label for size in camera.sizes])
 
     def on_camera_size_change(self):
-        camera_id = int(self.camera_ids.currentText())
-        size = self.camera_sizes.currentText()
-        fps_list = self.camera_info[camera_id][size]
         self.camera_fps.clear()
-        self.camera_fps.addItems(fps_list)
+        if camera_size := self.current_camera_size():
+            self.camera_fps.addItems([str(fps) for fps in camera_size.all_fps])
 
     def update_audio_bitrate(self, value):
         if value < 10:
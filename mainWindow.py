@@ -81,9 +81,13 @@ class Ui_Form(object):
         self.restart_adb_btn = PushButton(self.devices_card)
         self.restart_adb_btn.setObjectName("restart_adb_btn")
         self.horizontalLayout_14.addWidget(self.restart_adb_btn)
+        self.wireless_scan_btn = PushButton(self.devices_card)
+        self.wireless_scan_btn.setObjectName("wireless_scan_btn")
+        self.horizontalLayout_14.addWidget(self.wireless_scan_btn)
         self.horizontalLayout_14.setStretch(0, 2)
         self.verticalLayout.addLayout(self.horizontalLayout_14)
         self.adb_devices = ListWidget(self.devices_card)
+        self.adb_devices.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.adb_devices.setObjectName("adb_devices")
         self.verticalLayout.addWidget(self.adb_devices)
         self.verticalLayout_4.addWidget(self.devices_card)
@@ -99,6 +103,9 @@ class Ui_Form(object):
         self.tcpip_connect = CheckBox(self.CardWidget_2)
         self.tcpip_connect.setObjectName("tcpip_connect")
         self.verticalLayout_2.addWidget(self.tcpip_connect)
+        self.hot_standby = CheckBox(self.CardWidget_2)
+        self.hot_standby.setObjectName("hot_standby")
+        self.verticalLayout_2.addWidget(self.hot_standby)
         self.horizontalLayout_19 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_19.setObjectName("horizontalLayout_19")
         self.turn_screen_off = CheckBox(self.CardWidget_2)
@@ -167,6 +174,9 @@ class Ui_Form(object):
         self.run_scrcpy = PrimaryPushButton(self.CardWidget_6)
         self.run_scrcpy.setObjectName("run_scrcpy")
         self.horizontalLayout_3.addWidget(self.run_scrcpy)
+        self.sessions_btn = PushButton(self.CardWidget_6)
+        self.sessions_btn.setObjectName("sessions_btn")
+        self.horizontalLayout_3.addWidget(self.sessions_btn)
         self.pro_page = ToggleToolButton(self.CardWidget_6)
         icon = QtGui.QIcon()
         icon.addPixmap(QtGui.QPixmap(":/icon/res/right-c.svg"), QtGui.QIcon.Normal, QtGui.QIcon.Off)
@@ -394,6 +404,10 @@ class Ui_Form(object):
         self.video_av1 = RadioButton(self.groupBox_7)
         self.video_av1.setObjectName("video_av1")
         self.horizontalLayout_6.addWidget(self.video_av1)
+        self.auto_encoder = CheckBox(self.groupBox_7)
+        self.auto_encoder.setChecked(True)
+        self.auto_encoder.setObjectName("auto_encoder")
+        self.horizontalLayout_6.addWidget(self.auto_encoder)
         self.verticalLayout_18.addWidget(self.groupBox_7)
         self.horizontalLayout_4 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_4.setObjectName("horizontalLayout_4")
@@ -604,12 +618,16 @@ class Ui_Form(object):
         Form.setWindowTitle(_translate("Form", "Form"))
         self.get_devices_btn.setText(_translate("Form", "刷新设备列表"))
         self.restart_adb_btn.setText(_translate("Form", "重置ADB"))
+        self.wireless_scan_btn.setText(_translate("Form", "无线发现"))
         self.stay_awake.setToolTip(_translate("Form", "--stay-awake"))
         self.stay_awake.setText(_translate("Form", "投屏中保持亮屏"))
         self.tcpip_connect.setToolTip(_translate("Form", "--tcpip\n"
 "有线连接成功后自动转为无线通道\n"
 "此功能需要被控设备与此电脑处在同一局域网"))
         self.tcpip_connect.setText(_translate("Form", "有线连接转无线（连接成功后可拔线）"))
+        self.hot_standby.setToolTip(_translate("Form", "选中设备后提前完成启动准备：获取设备信息与编码器、预留端口并保持设备亮屏\n"
+"点击启动后只需启动scrcpy客户端"))
+        self.hot_standby.setText(_translate("Form", "热备模式（加快启动）"))
         self.turn_screen_off.setToolTip(_translate("Form", "--turn-screen-off"))
         self.turn_screen_off.setText(_translate("Form", "连接成功后熄屏"))
         self.power_off_on_close.setToolTip(_translate("Form", "--power-off-on-close"))
@@ -629,6 +647,8 @@ class Ui_Form(object):
         self.no_playback.setToolTip(_translate("Form", "--no-playback"))
         self.no_playback.setText(_translate("Form", "录制时禁用投屏"))
         self.run_scrcpy.setText(_translate("Form", "启动 Scrcpy 投屏"))
+        self.sessions_btn.setToolTip(_translate("Form", "查看、停止或重启正在运行的投屏会话"))
+        self.sessions_btn.setText(_translate("Form", "会话"))
         self.enable_video.setToolTip(_translate("Form", "--record"))
         self.enable_video.setText(_translate("Form", "视频通道"))
         self.enable_orientation.setTitle(_translate("Form", "设置旋转"))
@@ -648,6 +668,8 @@ class Ui_Form(object):
         self.video_h264.setText(_translate("Form", "H.264"))
         self.video_h265.setText(_translate("Form", "H.265"))
         self.video_av1.setText(_translate("Form", "AV1（可能不支持）"))
+        self.auto_encoder.setToolTip(_translate("Form", "--video-encoder"))
+        self.auto_encoder.setText(_translate("Form", "自动选择硬件编码器"))
         self.label_2.setText(_translate("Form", "码率："))
         self.video_bit.setText(_translate("Form", "2.00M"))
         self.enable_audio.setToolTip(_translate("Form", "--record"))
@@ -0,0 +1,188 @@
+import asyncio
+import os
+import platform
+import signal
+import subprocess
+import threading
+
+from consts import *
+
+if 'Windows' in platform.system():
+    PROCESS_GROUP_FLAGS = {'creationflags': CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    PROCESS_GROUP_FLAGS = {'start_new_session': True}
+
+
+class ProbeCancelled(Exception):
+    """命令因CancelToken被取消而结束时抛出"""
+
+
+class CancelToken:
+    """
+    取消令牌。调用cancel()后，所有使用该令牌、仍在运行的命令都会被结束。
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback):
+        """注册取消回调，令牌已取消时立即调用。"""
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def kill_process_group(pid):
+    """结束进程及其全部子进程（如scrcpy启动的adb）。"""
+    try:
+        if 'Windows' in platform.system():
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)], capture_output=True,
+                           creationflags=CREATE_NO_WINDOW)
+        else:
+            os.killpg(pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+
+def terminate_process_group(proc, timeout=SESSION_STOP_TIMEOUT):
+    """
+    请求进程正常退出，超过timeout仍未退出则强制结束其整个进程组（进程须以PROCESS_GROUP_FLAGS启动）。
+
+    正常退出的请求只发给进程本身：POSIX上为SIGTERM；Windows上子进程不共享控制台，控制台信号无法送达，
+    改用不带/F的taskkill向进程的窗口发送WM_CLOSE。scrcpy（SDL）把两者都当作关闭窗口处理，借此写完录像文件。
+    Windows上没有窗口的进程（如scrcpy --no-playback）不接受WM_CLOSE，此时立即强制结束，录像可能无法完整写入。
+
+    返回值:
+        int: 进程的返回码。
+    """
+    if proc.poll() is not None:
+        return proc.returncode
+    graceful = True
+    try:
+        if 'Windows' in platform.system():
+            graceful = subprocess.run(['taskkill', '/PID', str(proc.pid)], capture_output=True,
+                                      creationflags=CREATE_NO_WINDOW).returncode == 0
+        else:
+            proc.terminate()
+    except (OSError, subprocess.SubprocessError):
+        graceful = False
+    if graceful:
+        try:
+            return proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            pass
+    kill_process_group(proc.pid)
+    return proc.wait()
+
+
+def run(command, timeout=PROBE_TIMEOUT, cancel_token=None, check=False):
+    """
+    执行命令并等待其结束。命令在独立的进程组中运行，超时或取消时整个进程组都会被结束。
+
+    参数:
+        command (list): 命令及参数。
+        timeout (float, optional): 截止时间（秒），None表示不限时。默认为PROBE_TIMEOUT。
+        cancel_token (CancelToken, optional): 取消令牌。
+        check (bool, optional): 为True时返回码非0则抛出CalledProcessError。
+
+    返回值:
+        subprocess.CompletedProcess: stdout与stderr均为文本。
+
+    异常:
+        subprocess.TimeoutExpired: 超过截止时间。
+        ProbeCancelled: 被取消。
+        subprocess.CalledProcessError: check为True且返回码非0。
+    """
+    if cancel_token and cancel_token.cancelled:
+        raise ProbeCancelled(command)
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                            encoding='utf-8', errors='replace', **PROCESS_GROUP_FLAGS)
+    kill = lambda: kill_process_group(proc.pid)
+    if cancel_token:
+        cancel_token.add_callback(kill)
+    try:
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill()
+            proc.communicate()
+            raise
+    finally:
+        if cancel_token:
+            cancel_token.remove_callback(kill)
+    if cancel_token and cancel_token.cancelled:
+        raise ProbeCancelled(command)
+    if check and proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, command, stdout, stderr)
+    return subprocess.CompletedProcess(command, proc.returncode, stdout, stderr)
+
+
+async def _communicate(proc, on_line):
+    if on_line is None:
+        stdout, _ = await proc.communicate()
+        return stdout
+
+    lines = []
+
+    async def read_stdout():
+        while line := await proc.stdout.readline():
+            lines.append(line)
+            on_line(line.decode('utf-8', errors='replace'))
+
+    await asyncio.gather(read_stdout(), proc.stderr.read())
+    await proc.wait()
+    return b''.join(lines)
+
+
+async def run_async(command, timeout=PROBE_TIMEOUT, cancel_token=None, on_line=None):
+    """
+    run()的异步版本。协程被取消（asyncio.CancelledError）时同样结束整个进程组。
+
+    参数:
+        on_line (callable, optional): 逐行处理stdout的回调，每读到一行（含换行符）即调用一次。
+
+    返回值:
+        tuple: (returncode, stdout)。
+
+    异常:
+        asyncio.TimeoutError: 超过截止时间。
+        ProbeCancelled: 被取消令牌取消。
+    """
+    if cancel_token and cancel_token.cancelled:
+        raise ProbeCancelled(command)
+    proc = await asyncio.create_subprocess_exec(*command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                                **PROCESS_GROUP_FLAGS)
+    kill = lambda: kill_process_group(proc.pid)
+    if cancel_token:
+        cancel_token.add_callback(kill)
+    try:
+        stdout = await asyncio.wait_for(_communicate(proc, on_line), timeout)
+    except BaseException:
+        if proc.returncode is None:
+            kill()
+            await proc.wait()
+        raise
+    finally:
+        if cancel_token:
+            cancel_token.remove_callback(kill)
+    if cancel_token and cancel_token.cancelled:
+        raise ProbeCancelled(command)
+    return proc.returncode, stdout.decode('utf-8', errors='replace')
@@ -0,0 +1,167 @@
+import hashlib
+import re
+import socket
+import subprocess
+import threading
+import time
+
+import adb_client
+import runner
+from consts import *
+from device_cache import cache
+
+SERVER_CLASS = 'com.genymobile.scrcpy.Server'
+
+
+class ServerStager:
+    """
+    把scrcpy-server部署到设备上，供多次探测共享。
+
+    scrcpy客户端每次运行都会重新推送server；探测时改为直接在设备上启动已部署的副本。
+    本地文件的哈希只计算一次，每台设备先用md5sum比对已有副本，只有不一致时才推送。
+    比对结果记录在设备缓存中，设备断开或状态变化时随缓存失效，重新连接后再比对一次。
+    """
+
+    def __init__(self, local_path=SCRCPY_SERVER, device_path=SCRCPY_SERVER_DEVICE_PATH):
+        self.local_path = local_path
+        self.device_path = device_path
+        self._data = None
+        self._md5 = None
+        self._version = None
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _local(self):
+        with self._lock:
+            if self._data is None:
+                with open(self.local_path, 'rb') as f:
+                    self._data = f.read()
+                self._md5 = hashlib.md5(self._data).hexdigest()
+            return self._data, self._md5
+
+    @property
+    def version(self):
+        """server要求启动参数中的版本号与自身一致，取自scrcpy --version，只查询一次。"""
+        with self._lock:
+            if self._version is None:
+                output = runner.run([SCRCPY, '--version'], check=True).stdout
+                if not (match := re.match(r'scrcpy (\S+)', output)):
+                    raise adb_client.AdbError(f'无法识别scrcpy版本: {output.strip()}')
+                self._version = match.group(1)
+            return self._version
+
+    def _device_lock(self, serial):
+        with self._lock:
+            return self._locks.setdefault(serial, threading.Lock())
+
+    def stage(self, serial):
+        """
+        确保设备上的server副本与本地文件一致，同一设备的并发调用只会推送一次。
+
+        参数:
+            serial (str): 设备代号。
+
+        返回值:
+            bool: 本次是否推送了文件。
+
+        异常:
+            OSError: 本地server文件不存在或与设备通信失败。
+            AdbError: 推送失败。
+        """
+        data, md5 = self._local()
+        with self._device_lock(serial):
+            if cache.get(serial, 'server_md5') == md5:
+                return False
+            output, _ = adb_client.client.shell_session(serial).run(f'md5sum {self.device_path} 2>/dev/null')
+            pushed = output.split()[:1] != [md5]
+            if pushed:
+                adb_client.client.push(serial, data, self.device_path)
+            cache.set(serial, 'server_md5', md5)
+            return pushed
+
+    def command(self, *options):
+        """返回在设备上直接启动server的shell命令，options为key=value形式的server参数。"""
+        return f"CLASSPATH={self.device_path} app_process / {SERVER_CLASS} {self.version} {' '.join(options)} cleanup=false"
+
+
+stager = ServerStager()
+
+
+def list_command(serial, option):
+    """
+    部署server并返回列出设备信息的shell命令。
+
+    参数:
+        serial (str): 设备代号。
+        option (str): server的列出选项，如'list_displays'、'list_camera_sizes'。
+    """
+    stager.stage(serial)
+    return stager.command(f'{option}=true')
+
+
+def run_list(serial, option, timeout=PROBE_TIMEOUT, cancel_token=None):
+    """
+    在设备上直接启动已部署的server列出信息，输出与scrcpy --list-*相同。
+
+    参数:
+        serial (str): 设备代号。
+        option (str): server的列出选项，如'list_camera_sizes'。
+        timeout (float, optional): 截止时间（秒），包括部署server的时间。默认为PROBE_TIMEOUT。
+        cancel_token (runner.CancelToken, optional): 取消令牌，取消时断开连接，设备上的server随之结束。
+
+    返回值:
+        str: server的输出。
+
+    异常:
+        OSError: 与设备通信失败。
+        AdbError: 部署失败或server没有给出列表（如版本不匹配）。
+        subprocess.TimeoutExpired: 超过截止时间，此时同样断开连接。
+        runner.ProbeCancelled: 被取消。
+    """
+    deadline = time.monotonic() + timeout
+    command = list_command(serial, option)
+    conn = adb_client.client.transport(serial, timeout)
+    expired = threading.Event()
+
+    def disconnect():
+        try:
+            conn.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def expire():
+        expired.set()
+        disconnect()
+
+    # socket超时只限制单次recv，持续缓慢输出的设备需要由计时器按截止时间断开
+    timer = threading.Timer(max(deadline - time.monotonic(), 0), expire)
+    timer.daemon = True
+    timer.start()
+    if cancel_token:
+        cancel_token.add_callback(disconnect)
+    try:
+        conn.request(f'shell:{command}')
+        output = conn.read_all().decode('utf-8', errors='replace')
+    except (OSError, adb_client.AdbError) as e:
+        if cancel_token and cancel_token.cancelled:
+            raise runner.ProbeCancelled(command)
+        if expired.is_set() or isinstance(e, TimeoutError):
+            raise subprocess.TimeoutExpired(command, timeout) from e
+        raise
+    finally:
+        timer.cancel()
+        if cancel_token:
+            cancel_token.remove_callback(disconnect)
+        adb_client.client.release(conn)
+    if cancel_token and cancel_token.cancelled:
+        raise runner.ProbeCancelled(command)
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(command, timeout)
+    return check_list_output(option, output)
+
+
+def check_list_output(option, output):
+    """检查server是否给出了列表，没有时（如版本不匹配、设备不支持）抛出AdbError，否则原样返回output。"""
+    if 'INFO: List of' not in output:
+        raise adb_client.AdbError(output.strip() or f'{option}没有输出')
+    return output
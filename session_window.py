@@ -0,0 +1,119 @@
+import datetime
+import threading
+
+from PyQt5.QtCore import QItemSelectionModel, Qt, QTimer
+from PyQt5.QtWidgets import QAbstractItemView, QHBoxLayout, QHeaderView, QTableWidgetItem, QVBoxLayout, QWidget
+from qfluentwidgets import PrimaryPushButton, PushButton, TableWidget
+
+from consts import *
+from sessions import supervisor
+
+
+def format_uptime(seconds):
+    return str(datetime.timedelta(seconds=int(seconds))) if seconds is not None else '-'
+
+
+def format_cpu(cpu):
+    return f'{cpu:.1f}%' if cpu is not None else '-'
+
+
+def format_rss(rss):
+    return f'{rss / 1048576:.1f} MB' if rss is not None else '-'
+
+
+def format_status(session):
+    if session.running:
+        return '运行中' if session.timeline.complete else '启动中'
+    if session.stopped:
+        return '已停止'
+    return f'已退出（{session.returncode}）'
+
+
+class SessionWindow(QWidget):
+    """
+    会话列表：显示supervisor管理的全部scrcpy会话及其主机资源占用，可停止、重启会话。
+
+    窗口可见时每SESSION_SAMPLE_INTERVAL_MS采样一次/proc并刷新表格，隐藏后停止采样。
+    """
+    COLUMNS = ('编号', '设备', '参数', '状态', '运行时间', 'CPU', '内存')
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle(f'{TOOL_NAME} 投屏会话')
+        self.resize(860, 360)
+
+        self.table = TableWidget(self)
+        self.table.setColumnCount(len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+
+        self.stop_btn = PushButton('停止', self)
+        self.restart_btn = PushButton('重启', self)
+        self.remove_btn = PushButton('清除已结束', self)
+        self.stop_all_btn = PrimaryPushButton('全部停止', self)
+        self.stop_btn.clicked.connect(lambda: self.for_selected(supervisor.stop))
+        # 重启需要等待旧会话退出，放到后台线程，避免阻塞界面
+        self.restart_btn.clicked.connect(lambda: self.for_selected(
+            lambda session_id: threading.Thread(target=supervisor.restart, args=(session_id,), daemon=True).start()))
+        self.remove_btn.clicked.connect(self.remove_finished)
+        self.stop_all_btn.clicked.connect(
+            lambda: [supervisor.stop(session.id) for session in supervisor.sessions()])
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.stop_btn)
+        buttons.addWidget(self.restart_btn)
+        buttons.addWidget(self.remove_btn)
+        buttons.addStretch(1)
+        buttons.addWidget(self.stop_all_btn)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(SESSION_SAMPLE_INTERVAL_MS)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
+    def selected_ids(self):
+        return [self.table.item(index.row(), 0).data(Qt.UserRole)
+                for index in self.table.selectionModel().selectedRows()]
+
+    def for_selected(self, action):
+        for session_id in self.selected_ids():
+            action(session_id)
+        self.refresh()
+
+    def remove_finished(self):
+        for session in supervisor.sessions():
+            supervisor.remove(session.id)
+        self.refresh()
+
+    def refresh(self):
+        supervisor.sample()
+        selected = set(self.selected_ids())
+        sessions = supervisor.sessions()
+        self.table.setRowCount(len(sessions))
+        self.table.clearSelection()
+        for row, session in enumerate(sessions):
+            values = (str(session.id), session.serial or '默认设备', session.options, format_status(session),
+                      format_uptime(session.uptime), format_cpu(session.cpu), format_rss(session.rss))
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column == 0:
+                    item.setData(Qt.UserRole, session.id)
+                self.table.setItem(row, column, item)
+            if session.id in selected:
+                self.table.selectionModel().select(self.table.model().index(row, 0),
+                                                   QItemSelectionModel.Select | QItemSelectionModel.Rows)
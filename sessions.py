@@ -0,0 +1,274 @@
+import atexit
+import collections
+import itertools
+import os
+import subprocess
+import threading
+import time
+
+import launch_metrics
+import runner
+from consts import *
+
+try:
+    CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    CLOCK_TICKS = PAGE_SIZE = None
+
+
+def sample_process_groups():
+    """
+    读取/proc，按进程组汇总CPU时间与常驻内存。
+
+    返回值:
+        dict: {进程组号: (CPU时间（秒）, 常驻内存（字节）)}。没有/proc（如Windows）时为空字典。
+    """
+    groups = {}
+    if CLOCK_TICKS is None or not os.path.isdir('/proc'):
+        return groups
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 进程名可能包含空格与括号，字段从最后一个')'之后开始：state ppid pgrp ... utime(第12个) stime ... rss(第22个)
+        fields = stat[stat.rfind(b')') + 2:].split()
+        pgrp, ticks, rss = int(fields[2]), int(fields[11]) + int(fields[12]), int(fields[21])
+        cpu, memory = groups.get(pgrp, (0.0, 0))
+        groups[pgrp] = (cpu + ticks / CLOCK_TICKS, memory + rss * PAGE_SIZE)
+    return groups
+
+
+class Session:
+    """
+    一个由SessionSupervisor管理的scrcpy会话。
+
+    属性:
+        id (int): 会话编号，在本次运行中唯一。
+        serial (str): 设备代号，为None时由scrcpy自行选择设备。
+        args (list): scrcpy参数。
+        timeline (launch_metrics.LaunchTimeline): 本次启动的时间线。
+        returncode (int): 退出码，仍在运行时为None。
+        cpu (float): 最近一次采样得到的CPU占用（%），尚未采样或无法采样时为None。
+        rss (int): 最近一次采样得到的常驻内存（字节），含scrcpy启动的adb等子进程。
+        stopped (bool): 是否由stop()主动停止，用于区分异常退出。
+    """
+
+    def __init__(self, session_id, serial, args, proc, on_complete=None, on_exit=None):
+        self.id = session_id
+        self.serial = serial
+        self.args = list(args)
+        self.proc = proc
+        self.timeline = launch_metrics.LaunchTimeline(serial, args)
+        self.started = time.monotonic()
+        self.returncode = None
+        self.stopped = False
+        self.output = ''
+        self.cpu = None
+        self.rss = None
+        self.on_complete = on_complete
+        self.on_exit = on_exit
+        self._cpu_sample = None
+
+    @property
+    def running(self):
+        return self.returncode is None
+
+    @property
+    def uptime(self):
+        return time.monotonic() - self.started if self.running else None
+
+    @property
+    def options(self):
+        return ' '.join(self.args)
+
+
+class SessionSupervisor:
+    """
+    scrcpy会话的管理者：启动的每个scrcpy子进程都在独立的进程组中运行并被跟踪，可以停止、重启，程序退出时全部停止。
+
+    会话启动、完成启动或退出时调用listeners中的listener(session)，调用发生在调用方线程或输出读取线程中。
+
+    经launch()与restart()启动的会话共用concurrency个启动名额：同时处于启动阶段（尚未完成启动也未退出）的会话不超过
+    concurrency个，避免大量scrcpy同时推送server、初始化编码器压垮主机与USB总线；某个会话超过LAUNCH_SLOT_TIMEOUT
+    仍未完成启动时，不再占用名额。
+    """
+
+    def __init__(self, concurrency=LAUNCH_CONCURRENCY):
+        self.listeners = []
+        self._launch_slots = threading.BoundedSemaphore(concurrency)
+        self._sessions = collections.OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def sessions(self):
+        with self._lock:
+            return list(self._sessions.values())
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def start(self, serial, args, on_complete=None, on_exit=None):
+        """
+        启动scrcpy会话。
+
+        参数:
+            serial (str): 设备代号，以--serial传给scrcpy，为None时由scrcpy自行选择（或使用ANDROID_SERIAL）。
+            args (list): scrcpy参数，每项为一个参数，不经过shell，无需转义。
+            on_complete (callable, optional): on_complete(session)，启动完成（首帧等阶段全部出现）时调用。
+            on_exit (callable, optional): on_exit(session)，scrcpy退出时调用，session.output为最后几行输出。
+
+        返回值:
+            Session: 新会话。
+
+        异常:
+            OSError: 无法启动scrcpy。
+        """
+        # 直接启动scrcpy而不经过shell，跟踪与停止的都是scrcpy进程本身
+        command = [SCRCPY, *([f'--serial={serial}'] if serial else []), *args]
+        proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding='utf-8',
+                                errors='replace', cwd=BASEDIR, **runner.PROCESS_GROUP_FLAGS)
+        session = Session(next(self._ids), serial, args, proc, on_complete, on_exit)
+        with self._lock:
+            self._sessions[session.id] = session
+
+        def completed(_):
+            self._notify(session)
+            if session.on_complete:
+                session.on_complete(session)
+
+        def exited(returncode, output):
+            session.returncode = returncode
+            session.output = output
+            session.cpu = None
+            self._notify(session)
+            if session.on_exit:
+                session.on_exit(session)
+
+        launch_metrics.watch(proc, session.timeline, completed, exited)
+        self._notify(session)
+        return session
+
+    def launch(self, jobs, on_complete=None, on_exit=None, on_error=None):
+        """
+        在后台线程中依次启动多个会话，调用立即返回。每个会话启动前等待一个启动名额，名额由所有launch()与restart()共用。
+
+        参数:
+            jobs (list): [(serial, args)]，参数含义同start()。
+            on_complete, on_exit (callable, optional): 同start()。
+            on_error (callable, optional): on_error(serial, exception)，无法启动scrcpy时调用。
+
+        返回值:
+            threading.Thread: 启动线程。
+        """
+        def run():
+            for serial, args in jobs:
+                try:
+                    self._start_in_slot(serial, args, on_complete, on_exit)
+                except OSError as e:
+                    if on_error:
+                        on_error(serial, e)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self, session_id, wait=False):
+        """
+        停止会话：先请求scrcpy正常退出，超过SESSION_STOP_TIMEOUT再强制结束整个进程组，参见runner.terminate_process_group()。
+
+        参数:
+            wait (bool, optional): 是否等待进程退出。为False时在后台线程中等待，调用立即返回。
+        """
+        if not (session := self.get(session_id)) or not session.running:
+            return
+        session.stopped = True
+        if wait:
+            runner.terminate_process_group(session.proc)
+        else:
+            threading.Thread(target=runner.terminate_process_group, args=(session.proc,), daemon=True).start()
+
+    def restart(self, session_id):
+        """
+        以相同的设备与参数重新启动会话，旧会话从列表中移除。
+
+        返回值:
+            Session: 新会话，旧会话不存在时为None。
+        """
+        if not (session := self.get(session_id)):
+            return None
+        self.stop(session_id, wait=True)
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        return self._start_in_slot(session.serial, session.args, session.on_complete, session.on_exit)
+
+    def _start_in_slot(self, serial, args, on_complete=None, on_exit=None):
+        """等待一个启动名额后启动会话，会话完成启动、退出或超过LAUNCH_SLOT_TIMEOUT时归还名额。"""
+        self._launch_slots.acquire()
+        released = threading.Event()
+
+        def release(*_):
+            if not released.is_set():
+                released.set()
+                timer.cancel()
+                self._launch_slots.release()
+
+        def completed(session):
+            release()
+            if on_complete:
+                on_complete(session)
+
+        def exited(session):
+            release()
+            if on_exit:
+                on_exit(session)
+
+        timer = threading.Timer(LAUNCH_SLOT_TIMEOUT, release)
+        timer.daemon = True
+        timer.start()
+        try:
+            return self.start(serial, args, completed, exited)
+        except BaseException:
+            release()
+            raise
+
+    def remove(self, session_id):
+        """从列表中移除已经结束的会话。"""
+        with self._lock:
+            if (session := self._sessions.get(session_id)) and not session.running:
+                del self._sessions[session_id]
+
+    def stop_all(self):
+        """并行停止全部会话并等待其退出。"""
+        threads = [threading.Thread(target=self.stop, args=(session.id, True))
+                   for session in self.sessions() if session.running]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def sample(self):
+        """采样所有运行中会话的CPU占用与常驻内存，一次读取/proc即可覆盖全部会话。"""
+        groups = sample_process_groups()
+        now = time.monotonic()
+        for session in self.sessions():
+            if not session.running or session.proc.pid not in groups:
+                continue
+            cpu_time, session.rss = groups[session.proc.pid]
+            if session._cpu_sample:
+                last_cpu_time, last_time = session._cpu_sample
+                session.cpu = max(cpu_time - last_cpu_time, 0) / max(now - last_time, 1e-6) * 100
+            session._cpu_sample = (cpu_time, now)
+
+    def _notify(self, session):
+        for listener in self.listeners:
+            listener(session)
+
+
+supervisor = SessionSupervisor()
+atexit.register(supervisor.stop_all)
@@ -0,0 +1,5 @@
+"""
+adb/scrcpy模拟器，用于在没有真机的Linux环境中对设备探测流程做可重复的性能测试。
+
+用法参见simulator/bench.py与README。
+"""
@@ -0,0 +1,113 @@
+"""
+在模拟设备群上对设备探测流程做基准测试。
+
+    python -m simulator.bench --devices 40
+    python -m simulator.bench --fleet simulator/example_fleet.json
+
+脚本会启动模拟adb服务器，并通过环境变量把consts.ADB、consts.SCRCPY指向simulator/bin中的模拟程序，
+然后走真实的util、async_util代码路径计时。MainWindow的刷新流程没有Qt环境无法直接运行，这里在它使用的
+同一个事件循环（async_util.submit）中执行同一组异步探测代替。
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from simulator.fleet import Fleet
+
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    try:
+        result = fn(*args)
+        status = 'ok'
+    except Exception as e:
+        result = None
+        status = f'{type(e).__name__}: {e}'
+    print(f'{label:<44}{time.perf_counter() - start:>9.3f}s  {status}')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PyQtScrcpy设备探测基准测试')
+    parser.add_argument('--fleet', help='设备群描述文件')
+    parser.add_argument('--devices', type=int, default=20, help='未指定--fleet时生成的模拟设备数量')
+    parser.add_argument('--probe', type=int, default=3, help='逐台执行屏幕/摄像头探测的设备数量')
+    args = parser.parse_args()
+
+    fleet = Fleet.load(args.fleet) if args.fleet else Fleet.generate(args.devices)
+    work_dir = tempfile.mkdtemp(prefix='pyqtscrcpy-bench-')
+    fleet_path = os.path.join(work_dir, 'fleet.json')
+    fleet.save(fleet_path)
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    # consts在导入时读取这些环境变量，必须先于任何项目模块的导入设置
+    os.environ['PYQTSCRCPY_FLEET'] = fleet_path
+    os.environ['ANDROID_ADB_SERVER_PORT'] = str(port)
+    os.environ['PYQTSCRCPY_ADB'] = os.path.join(ROOT, 'simulator', 'bin', 'adb')
+    os.environ['PYQTSCRCPY_SCRCPY'] = os.path.join(ROOT, 'simulator', 'bin', 'scrcpy')
+
+    from simulator.fake_adb_server import serve
+    server = serve(fleet, port)
+
+    import async_util
+    import util
+    from capability_service import service
+    from device_cache import cache, store
+
+    def cold(section):
+        # 每个部分换用临时目录中的新磁盘缓存并清空内存缓存，测得的都是冷启动，不会命中前面部分写入的结果
+        store.path = os.path.join(work_dir, f'capabilities-{section}.json')
+        store._data = None
+        store._revalidated = set()
+        cache.clear()
+
+    cold('devices')
+
+    print(f'模拟设备: {len(fleet.devices)}  adb服务器端口: {server.port}\n')
+    found = timed('util.devices() 冷启动', util.devices)
+    timed('util.devices() 缓存命中', util.devices)
+    cold('async-devices')
+    timed('async_util.devices() 冷启动', lambda: async_util.submit(async_util.devices()).result())
+
+    serials = list(found[0])[:args.probe] if found else []
+    for serial in serials:
+        timed(f'util.get_display_ids({serial})', util.get_display_ids, serial)
+        timed(f'util.get_camera_sizes({serial})', util.get_camera_sizes, serial)
+        timed(f'util.get_display_ids({serial}) 缓存命中', util.get_display_ids, serial)
+
+    cold('refresh')
+
+    async def refresh(serial):
+        # 与MainWindow.refresh_pro_page相同，各项探测并发进行
+        return await asyncio.gather(*(service.get(serial, key) for key in ('displays', 'encoders', 'cameras')))
+
+    for serial in serials:
+        timed(f'刷新高级页面({serial})', lambda: async_util.submit(refresh(serial)).result())
+
+    cold('merged')
+
+    async def merged(serial):
+        # 多个调用方同时查询同一设备，只进行一次探测
+        return await asyncio.gather(*(service.get(serial, 'cameras') for _ in range(10)))
+
+    if serials:
+        timed(f'10个并发摄像头查询({serials[0]})', lambda: async_util.submit(merged(serials[0])).result())
+
+    cold('query')
+    timed(f'批量查询{len(found[0]) if found else 0}台设备', service.query_sync, list(found[0]) if found else [])
+
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == '__main__':
+    main()
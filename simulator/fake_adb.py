@@ -0,0 +1,69 @@
+"""
+替代adb命令行的模拟程序，通过consts.ADB（环境变量PYQTSCRCPY_ADB）选用。
+
+支持start-server、kill-server、devices、mdns services、connect与shell，其中与设备相关的命令都转发给模拟adb服务器。
+"""
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import adb_client
+from simulator.fake_adb_server import is_running
+from simulator.fleet import Fleet
+
+
+def main(argv):
+    port = int(os.environ.get('ANDROID_ADB_SERVER_PORT', 5037))
+    serial = os.environ.get('ANDROID_SERIAL')
+    while argv and argv[0] in ('-s', '-P'):
+        if argv[0] == '-s':
+            serial = argv[1]
+        else:
+            port = int(argv[1])
+        argv = argv[2:]
+    client = adb_client.AdbClient(port=port)
+    command, args = (argv[0], argv[1:]) if argv else ('help', [])
+
+    if command == 'start-server':
+        if not is_running(port):
+            subprocess.Popen([sys.executable, '-m', 'simulator.fake_adb_server', '--port', str(port)],
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+            while not is_running(port):
+                time.sleep(0.05)
+        return 0
+    if command == 'kill-server':
+        client.kill_server()
+        return 0
+    if command == 'devices':
+        print('List of devices attached')
+        for device_serial, state in adb_client.parse_device_states(client.host_query('host:devices')).items():
+            print(f'{device_serial}\t{state}')
+        return 0
+    if command == 'mdns' and args[:1] == ['services']:
+        print('List of discovered mdns services')
+        for endpoint in Fleet.load().wireless:
+            print(f"adb-{endpoint.replace(':', '-')}\t_adb-tls-connect._tcp.\t{endpoint}")
+        return 0
+    if command == 'connect' and args:
+        print(client.host_query(f'host:connect:{args[0]}'))
+        return 0
+    if command in ('shell', 'exec-out'):
+        try:
+            if command == 'shell':
+                sys.stdout.write(client.shell(serial, ' '.join(args)))
+            else:
+                sys.stdout.buffer.write(client.exec_out(serial, ' '.join(args)))
+        except adb_client.AdbError as e:
+            print(f'adb: error: {e}', file=sys.stderr)
+            return 1
+        return 0
+    print(f'adb (simulator): unsupported command: {" ".join(argv)}', file=sys.stderr)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
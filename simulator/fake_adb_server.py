@@ -0,0 +1,265 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import adb_client
+from simulator.fleet import Fleet, format_dumpsys_display, props
+
+# 每台模拟设备的shell命令，由真实的sh执行；$SIM_DIR指向该设备的数据目录
+DEVICE_SCRIPTS = {
+    'getprop': '''if [ -z "$1" ]; then cat "$SIM_DIR/props"; else grep -F "[$1]: " "$SIM_DIR/props" | sed 's/^.*\\]: \\[\\(.*\\)\\]$/\\1/'; fi''',
+    'settings': '''if [ "$1" = get ]; then grep -F "$2/$3=" "$SIM_DIR/settings" | cut -d= -f2- | grep . || echo null; fi''',
+    'dumpsys': '''if [ "$1" = display ]; then cat "$SIM_DIR/dumpsys_display"; fi''',
+    # 设备上的文件位于$SIM_DIR/fs下
+    'md5sum': '''for f; do PATH=/usr/bin:/bin md5sum "$SIM_DIR/fs$f" | sed "s#$SIM_DIR/fs##"; done''',
+    'app_process': '''exec "${PYTHON:-python3}" "$SIM_TOOLS/fake_scrcpy.py" --app-process "$@"''',
+    # 记录收到的按键事件，供检查热备的唤醒
+    'input': '''if [ "$1" = keyevent ]; then echo "$2" >> "$SIM_DIR/keyevents"; fi''',
+    'wm': '''case "$1" in size) echo "Physical size: $SIM_SIZE";; density) echo "Physical density: $SIM_DENSITY";; esac''',
+}
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    """
+    实现adb服务器socket协议的模拟服务器，设备由Fleet描述。
+
+    支持host:version、host:devices(-l)、host:track-devices、host:transport(-any)、host:connect、host:kill，
+    以及切换到设备后的shell:（含常驻的shell:sh）与exec:。设备端命令由本机sh执行，getprop、settings、wm、dumpsys等
+    命令被替换为读取模拟数据的脚本，并按Fleet中的延迟与失败率注入延迟和故障。
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, fleet, port=0):
+        super().__init__(('127.0.0.1', port), FakeAdbHandler)
+        self.fleet = fleet
+        self.root = tempfile.mkdtemp(prefix='pyqtscrcpy-sim-')
+        self.trackers = []
+        self.lock = threading.Lock()
+        for device in fleet.devices.values():
+            self._prepare(device)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def _prepare(self, device):
+        path = os.path.join(self.root, device['serial'].replace(':', '_'))
+        bin_path = os.path.join(path, 'bin')
+        os.makedirs(bin_path, exist_ok=True)
+        with open(os.path.join(path, 'props'), 'w', encoding='utf-8') as f:
+            f.writelines(f'[{key}]: [{value}]\n' for key, value in props(device).items())
+        with open(os.path.join(path, 'settings'), 'w', encoding='utf-8') as f:
+            f.write(f"global/device_name={device['name']}\n")
+            f.writelines(f'{key}={value}\n' for key, value in device.get('settings', {}).items())
+        with open(os.path.join(path, 'device.json'), 'w', encoding='utf-8') as f:
+            json.dump(device, f, ensure_ascii=False)
+        with open(os.path.join(path, 'dumpsys_display'), 'w', encoding='utf-8') as f:
+            f.write(format_dumpsys_display(device))
+        delay = device['latency']['shell']
+        for name, body in {**DEVICE_SCRIPTS, **device.get('scripts', {})}.items():
+            script = os.path.join(bin_path, name)
+            with open(script, 'w', encoding='utf-8') as f:
+                f.write(f'#!/bin/sh\nsleep {delay}\n{body}\n')
+            os.chmod(script, 0o755)
+        device['_dir'] = path
+
+    def device_env(self, device):
+        env = dict(os.environ)
+        env['PATH'] = os.path.join(device['_dir'], 'bin') + os.pathsep + env['PATH']
+        env['SIM_DIR'] = device['_dir']
+        env['SIM_TOOLS'] = os.path.dirname(os.path.abspath(__file__))
+        env['SIM_SIZE'] = f"{device['size'][0]}x{device['size'][1]}"
+        env['SIM_DENSITY'] = str(device['density'])
+        return env
+
+    def device_list(self, long=False):
+        lines = []
+        for serial, device in self.fleet.devices.items():
+            line = f"{serial}\t{device['state']}"
+            if long:
+                line = f"{serial:<22} {device['state']} product:{device['model']} model:{device['model']} " \
+                       f"device:{device['model']} transport_id:{list(self.fleet.devices).index(serial) + 1}"
+            lines.append(line + '\n')
+        return ''.join(lines)
+
+    def set_state(self, serial, state):
+        """修改设备状态，state为None表示拔出设备。变化会推送给所有track-devices连接。"""
+        with self.lock:
+            if state is None:
+                self.fleet.devices.pop(serial, None)
+            elif serial in self.fleet.devices:
+                self.fleet.devices[serial]['state'] = state
+        self.notify()
+
+    def add_device(self, device):
+        with self.lock:
+            self._prepare(self.fleet.add(device))
+        self.notify()
+
+    def notify(self):
+        data = self.device_list().encode('utf-8')
+        for sock in list(self.trackers):
+            try:
+                sock.sendall(b'%04x' % len(data) + data)
+            except OSError:
+                self.trackers.remove(sock)
+
+    def server_close(self):
+        super().server_close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class FakeAdbHandler(socketserver.BaseRequestHandler):
+    def okay(self, data=None):
+        payload = b'OKAY'
+        if data is not None:
+            data = data.encode('utf-8')
+            payload += b'%04x' % len(data) + data
+        self.request.sendall(payload)
+
+    def fail(self, message):
+        data = message.encode('utf-8')
+        self.request.sendall(b'FAIL' + b'%04x' % len(data) + data)
+
+    def handle(self):
+        conn = adb_client.AdbConnection(self.request)
+        server = self.server
+        try:
+            request = conn.read_hex_length_data()
+        except (OSError, adb_client.AdbError):
+            return
+
+        if request == 'host:version':
+            return self.okay('0029')
+        if request in ('host:devices', 'host:devices-l'):
+            return self.okay(server.device_list(long=request.endswith('-l')))
+        if request == 'host:track-devices':
+            self.okay()
+            data = server.device_list().encode('utf-8')
+            self.request.sendall(b'%04x' % len(data) + data)
+            server.trackers.append(self.request)
+            while self.request.recv(1024):
+                pass
+            return
+        if request == 'host:kill':
+            self.okay()
+            threading.Thread(target=server.shutdown, daemon=True).start()
+            return
+        if request.startswith('host:connect:'):
+            endpoint = request.split(':', 2)[2]
+            if endpoint in server.fleet.devices:
+                return self.okay(f'already connected to {endpoint}')
+            if endpoint not in server.fleet.wireless:
+                return self.okay(f'failed to connect to {endpoint}')
+            server.add_device({'serial': endpoint, 'name': f'Wireless {endpoint}'})
+            return self.okay(f'connected to {endpoint}')
+        if not request.startswith('host:transport'):
+            return self.fail(f'unknown host service: {request}')
+
+        if request == 'host:transport-any':
+            online = [device for device in server.fleet.devices.values() if device['state'] == 'device']
+            if len(online) != 1:
+                return self.fail('more than one device/emulator' if online else 'no devices/emulators found')
+            device = online[0]
+        else:
+            device = server.fleet.get(request.split(':', 2)[2])
+            if device is None:
+                return self.fail(f"device '{request.split(':', 2)[2]}' not found")
+        if device['state'] != 'device':
+            return self.fail(f"device {device['state']}")
+        time.sleep(device['latency']['transport'])
+        if random.random() < device['failure_rate']:
+            return self.fail('device offline (injected failure)')
+        self.okay()
+
+        service = conn.read_hex_length_data()
+        if service in ('shell:', 'shell:sh'):
+            self.okay()
+            return self.interactive(device)
+        if service == 'sync:':
+            self.okay()
+            return self.sync(conn, device)
+        if service.startswith(('shell:', 'exec:')):
+            self.okay()
+            # 边运行边转发输出，与真实设备一致
+            proc = subprocess.Popen(['sh', '-c', service.split(':', 1)[1]], env=server.device_env(device),
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            try:
+                while data := proc.stdout.read1(65536):
+                    self.request.sendall(data)
+            except OSError:
+                proc.kill()
+            finally:
+                proc.wait()
+            return
+        self.fail(f'unsupported service: {service}')
+
+    def sync(self, conn, device):
+        """sync协议，只支持SEND（adb push）。"""
+        command = conn.read_exact(4)
+        path = conn.read_exact(struct.unpack('<I', conn.read_exact(4))[0]).decode('utf-8').rsplit(',', 1)[0]
+        if command != b'SEND':
+            message = f'unsupported sync command: {command!r}'.encode('utf-8')
+            return self.request.sendall(b'FAIL' + struct.pack('<I', len(message)) + message)
+        data = bytearray()
+        while conn.read_exact(4) == b'DATA':
+            data += conn.read_exact(struct.unpack('<I', conn.read_exact(4))[0])
+        conn.read_exact(4)  # DONE之后的修改时间
+        time.sleep(device['latency']['push'])
+        target = os.path.join(device['_dir'], 'fs', path.lstrip('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+        self.request.sendall(b'OKAY' + struct.pack('<I', 0))
+
+    def interactive(self, device):
+        proc = subprocess.Popen(['sh'], stdin=subprocess.PIPE, stdout=self.request.makefile('wb', 0),
+                                stderr=subprocess.STDOUT, env=self.server.device_env(device))
+        try:
+            while data := self.request.recv(65536):
+                proc.stdin.write(data)
+                proc.stdin.flush()
+        except OSError:
+            pass
+        finally:
+            proc.kill()
+
+
+def serve(fleet, port=0):
+    """在后台线程中启动模拟adb服务器并返回它。"""
+    server = FakeAdbServer(fleet, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def is_running(port):
+    try:
+        socket.create_connection(('127.0.0.1', port), timeout=1).close()
+        return True
+    except OSError:
+        return False
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='模拟adb服务器')
+    parser.add_argument('--fleet', help='设备群描述文件，默认使用环境变量PYQTSCRCPY_FLEET')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('ANDROID_ADB_SERVER_PORT', 5037)))
+    args = parser.parse_args()
+    server = FakeAdbServer(Fleet.load(args.fleet), args.port)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,142 @@
+"""
+替代scrcpy命令行的模拟程序，通过consts.SCRCPY（环境变量PYQTSCRCPY_SCRCPY）选用。
+
+按Fleet中的延迟输出--list-displays、--list-camera-sizes、--list-encoders的结果；不带--list-*时模拟一次镜像会话，
+依次输出与真实scrcpy相同的阶段日志，然后一直运行到被结束。每次运行都会先模拟推送scrcpy-server。
+
+以--app-process调用时模拟设备上直接启动的server（模拟adb服务器中的app_process命令），此时不推送。
+"""
+import json
+import os
+import random
+import re
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulator.fleet import SCRCPY_VERSION, Fleet, format_camera_sizes, format_displays, format_encoders
+
+SERVER_CLASS = 'com.genymobile.scrcpy.Server'
+
+LIST_OPTIONS = {
+    '--list-displays': ('list_displays', format_displays),
+    '--list-camera-sizes': ('list_camera_sizes', format_camera_sizes),
+    '--list-encoders': ('list_encoders', format_encoders),
+}
+
+
+def option_value(args, *names):
+    for i, arg in enumerate(args):
+        for name in names:
+            if arg.startswith(name + '='):
+                return arg.split('=', 1)[1]
+            if arg == name and i + 1 < len(args):
+                return args[i + 1]
+    return None
+
+
+def select_device(fleet, serial):
+    online = [device for device in fleet.devices.values() if device['state'] == 'device']
+    if serial:
+        device = fleet.get(serial)
+        if device is None or device['state'] != 'device':
+            print(f'ERROR: Could not find ADB device {serial}:', file=sys.stderr)
+            return None
+        return device
+    if len(online) != 1:
+        print(f'ERROR: Multiple ({len(online)}) ADB devices:' if online else 'ERROR: Could not find any ADB device',
+              file=sys.stderr)
+        return None
+    return online[0]
+
+
+def wait(device, operation, share=1.0):
+    if operation in device['hang']:
+        signal.pause() if hasattr(signal, 'pause') else time.sleep(1e9)
+    time.sleep(device['latency'][operation] * share)
+    if random.random() < device['failure_rate']:
+        print(f'ERROR: Server connection failed (injected failure: {operation})', file=sys.stderr)
+        sys.exit(1)
+
+
+def print_list(device, operation, formatter):
+    """按延迟输出列表。摄像头需要逐个打开，延迟平均分配到每个摄像头，输出随之逐段出现。"""
+    output = formatter(device)
+    if operation != 'list_camera_sizes':
+        wait(device, operation)
+        print(output, end='', flush=True)
+        return
+    header, *cameras = re.split(r'(?m)^(?=    --camera-id=)', output)
+    print(header, end='', flush=True)
+    for camera in cameras:
+        wait(device, operation, 1 / len(cameras))
+        print(camera, end='', flush=True)
+
+
+def app_process(args):
+    """模拟CLASSPATH=<jar> app_process / com.genymobile.scrcpy.Server <version> [key=value...]"""
+    sim_dir = os.environ['SIM_DIR']
+    with open(os.path.join(sim_dir, 'device.json'), encoding='utf-8') as f:
+        device = json.load(f)
+    classpath = os.environ.get('CLASSPATH', '')
+    if len(args) < 3 or args[1] != SERVER_CLASS or not os.path.isfile(os.path.join(sim_dir, 'fs', classpath.lstrip('/'))):
+        print(f'Error: Could not find class {args[1] if len(args) > 1 else ""}', file=sys.stderr)
+        return 1
+    if args[2] != SCRCPY_VERSION:
+        print(f'[server] ERROR: The server version ({SCRCPY_VERSION}) does not match the client ({args[2]})', flush=True)
+        return 1
+    options = dict(arg.split('=', 1) for arg in args[3:] if '=' in arg)
+    for option, (operation, formatter) in LIST_OPTIONS.items():
+        if options.get(option.lstrip('-').replace('-', '_')) == 'true':
+            print_list(device, operation, formatter)
+            return 0
+    print('[server] ERROR: simulator only supports list_* options', flush=True)
+    return 1
+
+
+def main(args):
+    if args[:1] == ['--app-process']:
+        return app_process(args[1:])
+    print(f'scrcpy {SCRCPY_VERSION} <https://github.com/Genymobile/scrcpy>', flush=True)
+    if '--version' in args or '-v' in args:
+        return 0
+    device = select_device(Fleet.load(), option_value(args, '--serial', '-s') or os.environ.get('ANDROID_SERIAL'))
+    if device is None:
+        return 1
+
+    for option, (operation, formatter) in LIST_OPTIONS.items():
+        if option in args:
+            time.sleep(device['latency']['push'])
+            print('scrcpy-server: 1 file pushed, 0 skipped.', flush=True)
+            print_list(device, operation, formatter)
+            return 0
+
+    time.sleep(device['latency']['push'])
+    print('scrcpy-server: 1 file pushed, 0 skipped.', flush=True)
+    # 启动耗时按server启动、建立连接、首帧依次分配，日志逐行出现
+    wait(device, 'launch', 0.4)
+    print(f"[server] INFO: Device: [{device['manufacturer']}] {device['model']} (Android {device['release']})", flush=True)
+    time.sleep(device['latency']['launch'] * 0.3)
+    print('INFO: Renderer: opengl', flush=True)
+    time.sleep(device['latency']['launch'] * 0.3)
+    print(f"INFO: Texture: {device['size'][0]}x{device['size'][1]}", flush=True)
+    record = option_value(args, '--record', '-r')
+    if record:
+        print(f'INFO: Recording started to mp4 file: {record}', flush=True)
+
+    # 与scrcpy（SDL）一致，SIGTERM视为关闭窗口：写完录像后正常退出
+    def close(*_):
+        if record:
+            print(f'INFO: Recording complete to mp4 file: {record}', flush=True)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, close)
+    limit = option_value(args, '--time-limit')
+    time.sleep(float(limit) if limit else 1e9)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
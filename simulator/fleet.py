@@ -0,0 +1,179 @@
+import copy
+import json
+import os
+
+SCRCPY_VERSION = '2.5'
+
+DEFAULT_LATENCY = {
+    'transport': 0.005,  # adb服务器切换到设备的往返延迟
+    'shell': 0.02,  # 设备上每条模拟命令（getprop、settings、wm等）的执行耗时
+    'push': 0.3,  # 推送scrcpy-server（scrcpy客户端每次运行都会推送）
+    'list_displays': 0.5,  # 启动server并列出屏幕
+    'list_camera_sizes': 2.2,  # 启动server并列出摄像头分辨率（还需打开相机服务）
+    'list_encoders': 1.0,
+    'launch': 1.5,  # 镜像会话从启动到首帧
+}
+
+DEFAULT_DEVICE = {
+    'state': 'device',
+    'name': 'Sim Phone',
+    'model': 'SimPhone',
+    'manufacturer': 'Simulator',
+    'sdk': 34,
+    'release': '14',
+    'abi': 'arm64-v8a',
+    'adb_input': '1',
+    'size': [1080, 2400],
+    'density': 420,
+    'displays': [{'id': 0, 'size': [1080, 2400], 'state': 'ON'}],
+    'cameras': [
+        {
+            'id': 0, 'facing': 'back', 'active_size': [4000, 3000], 'fps': [15, 24, 30],
+            'sizes': [[4000, 3000], [3840, 2160], [1920, 1080], [1280, 720]],
+            'high_speed': [{'size': [1920, 1080], 'fps': [120, 240]}, {'size': [1280, 720], 'fps': [120, 240, 480]}],
+        },
+        {
+            'id': 1, 'facing': 'front', 'active_size': [3264, 2448], 'fps': [15, 30],
+            'sizes': [[3264, 2448], [1920, 1080], [1280, 720]],
+            'high_speed': [],
+        },
+    ],
+    'encoders': {
+        'video': [
+            {'codec': 'h264', 'encoder': 'c2.sim.avc.encoder'},
+            {'codec': 'h265', 'encoder': 'c2.sim.hevc.encoder'},
+            {'codec': 'h264', 'encoder': 'c2.android.avc.encoder'},
+            {'codec': 'h265', 'encoder': 'c2.android.hevc.encoder'},
+            {'codec': 'av1', 'encoder': 'c2.android.av1.encoder'},
+        ],
+        'audio': [
+            {'codec': 'opus', 'encoder': 'c2.android.opus.encoder'},
+            {'codec': 'aac', 'encoder': 'c2.android.aac.encoder'},
+            {'codec': 'flac', 'encoder': 'c2.android.flac.encoder'},
+        ],
+    },
+    'latency': {},
+    'failure_rate': 0.0,  # 每次操作随机失败的概率
+    'hang': [],  # 永远不返回的操作，如["list_camera_sizes"]，用于测试截止时间
+}
+
+
+class Fleet:
+    """
+    模拟设备群的描述，可从JSON文件加载。
+
+    JSON格式：{"latency": {...}, "failure_rate": 0.0, "count": N, "template": {...}, "devices": [{...}], "wireless": [...]}
+    devices中的每一项会与template及DEFAULT_DEVICE合并；给出count时会按template再生成设备，直到总数达到count。
+    wireless为可通过adb connect连接的地址列表，同时会出现在adb mdns services的结果中。
+    """
+
+    def __init__(self, devices, latency=None, failure_rate=0.0, wireless=()):
+        self.latency = {**DEFAULT_LATENCY, **(latency or {})}
+        self.failure_rate = failure_rate
+        self.devices = {}
+        for device in devices:
+            self.add(device)
+        self.wireless = list(wireless)
+
+    def add(self, device):
+        device = {**copy.deepcopy(DEFAULT_DEVICE), **device}
+        device['latency'] = {**self.latency, **device['latency']}
+        device.setdefault('failure_rate', self.failure_rate)
+        self.devices[device['serial']] = device
+        return device
+
+    def get(self, serial):
+        return self.devices.get(serial)
+
+    @classmethod
+    def generate(cls, count, template=None, **kwargs):
+        template = template or {}
+        devices = [{**template, 'serial': f'SIM{i:04d}', 'name': f"{template.get('name', 'Sim Phone')} {i}"}
+                   for i in range(count)]
+        return cls(devices, **kwargs)
+
+    @classmethod
+    def from_dict(cls, data):
+        template = data.get('template', {})
+        devices = [{**template, **device} for device in data.get('devices', [])]
+        for i in range(len(devices), data.get('count', 0)):
+            devices.append({**template, 'serial': f'SIM{i:04d}', 'name': f"{template.get('name', 'Sim Phone')} {i}"})
+        return cls(devices, data.get('latency'), data.get('failure_rate', 0.0), data.get('wireless', ()))
+
+    @classmethod
+    def load(cls, path=None):
+        """加载模拟设备群，path为None时使用环境变量PYQTSCRCPY_FLEET。"""
+        with open(path or os.environ['PYQTSCRCPY_FLEET'], encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self):
+        return {'latency': self.latency, 'failure_rate': self.failure_rate, 'wireless': self.wireless,
+                'devices': list(self.devices.values())}
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+def props(device):
+    """生成设备的getprop属性。"""
+    return {
+        'ro.product.model': device['model'],
+        'ro.product.manufacturer': device['manufacturer'],
+        'ro.product.cpu.abi': device['abi'],
+        'ro.build.version.sdk': str(device['sdk']),
+        'ro.build.version.release': device['release'],
+        'ro.build.fingerprint': device.get(
+            'fingerprint', f"Simulator/{device['model']}/{device['serial']}:{device['release']}/SIM.1/1:user/release-keys"),
+        'ro.serialno': device['serial'],
+        'persist.security.adbinput': device['adb_input'],
+        **device.get('props', {}),
+    }
+
+
+def format_size(size):
+    return f'{size[0]}x{size[1]}'
+
+
+def format_displays(device):
+    """生成与scrcpy --list-displays相同格式的输出。"""
+    lines = ['[server] INFO: List of displays:']
+    lines += [f"    --display-id={display['id']}    ({format_size(display['size'])})" for display in device['displays']]
+    return '\n'.join(lines) + '\n'
+
+
+def format_dumpsys_display(device):
+    """生成dumpsys display中逻辑屏幕部分的输出，Android 10以下的DisplayInfo不含displayId。"""
+    lines = ['DISPLAY MANAGER (dumpsys display)', f"Logical Displays: size={len(device['displays'])}"]
+    for display in device['displays']:
+        width, height = display['size']
+        display_id = f", displayId {display['id']}" if int(device['sdk']) >= 29 else ''
+        name = 'Built-in Screen' if display['id'] == 0 else f"Overlay #{display['id']}"
+        info = (f'DisplayInfo{{"{name}"{display_id}, app {width} x {height}, real {width} x {height}, '
+                f"density {device['density']}, state {display['state']}, committedState {display['state']}}}")
+        lines += [f"  Display {display['id']}:", f"    mDisplayId={display['id']}",
+                  f'    mBaseDisplayInfo={info}', f'    mOverrideDisplayInfo={info}']
+    return '\n'.join(lines) + '\n'
+
+
+def format_camera_sizes(device):
+    """生成与scrcpy --list-camera-sizes相同格式的输出。"""
+    lines = ['[server] INFO: List of cameras:']
+    for camera in device['cameras']:
+        fps = ', '.join(map(str, camera['fps']))
+        lines.append(f"    --camera-id={camera['id']}    ({camera['facing']}, {format_size(camera['active_size'])}, fps=[{fps}])")
+        lines += [f'        - {format_size(size)}' for size in camera['sizes']]
+        if camera['high_speed']:
+            lines.append('        High speed capture (--camera-high-speed):')
+            for mode in camera['high_speed']:
+                lines.append(f"            - {format_size(mode['size'])} (fps=[{', '.join(map(str, mode['fps']))}])")
+    return '\n'.join(lines) + '\n'
+
+
+def format_encoders(device):
+    """生成与scrcpy 2.5 --list-encoders相同格式的输出：名称带引号，不标注编码器类型。"""
+    lines = ['[server] INFO: List of video encoders:']
+    lines += [f"    --video-codec={e['codec']} --video-encoder='{e['encoder']}'" for e in device['encoders']['video']]
+    lines.append('[server] INFO: List of audio encoders:')
+    lines += [f"    --audio-codec={e['codec']} --audio-encoder='{e['encoder']}'" for e in device['encoders']['audio']]
+    return '\n'.join(lines) + '\n'
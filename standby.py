@@ -0,0 +1,126 @@
+import asyncio
+import collections
+import socket
+
+import adb_client
+import async_util
+from capability_service import service
+from consts import *
+
+WAKE_COMMAND = 'input keyevent KEYCODE_WAKEUP'
+
+
+def reserve_port(exclude=()):
+    """
+    绑定一个空闲且不在exclude中的本地TCP端口并返回该socket。socket保持绑定期间其他程序无法占用这个端口。
+    """
+    while True:
+        sock = socket.socket()
+        sock.bind((ADB_HOST, 0))
+        if sock.getsockname()[1] not in exclude:
+            return sock
+        sock.close()
+
+
+class HotStandby:
+    """
+    热备：为选中的设备提前完成启动前的准备，点击启动后只剩scrcpy客户端自身的流程。
+
+    scrcpy客户端不能连接到已经启动的server，推送server、启动app_process与初始化编码器仍由客户端完成。
+    热备提前完成其余部分：属性快照与编码器清单（决定--video-encoder，探测时已部署server副本）、
+    为会话预留与其他会话不冲突的本地端口（--port，保持绑定直到启动时取出），并定时唤醒设备，省去server启动时点亮屏幕的等待。
+
+    arm()、disarm()、switch()须在async_util的事件循环中运行；take()在启动时从GUI线程调用。
+    """
+
+    def __init__(self, wake_interval=STANDBY_WAKE_INTERVAL):
+        self.wake_interval = wake_interval
+        self.ports = {}
+        self._sockets = {}
+        self._taken = collections.deque(maxlen=64)
+        self._preparing = {}
+        self._keepalive = {}
+
+    def ready(self, serial):
+        return serial in self.ports
+
+    async def arm(self, serial):
+        """
+        为设备做好启动准备，并在后台定时唤醒设备直到disarm()。已处于热备的设备重新准备一次。
+        准备期间被disarm()或switch()到其他设备时，准备随之取消，设备不会进入热备。
+
+        返回值:
+            int: 预留的本地端口。
+
+        异常:
+            OSError: 与设备通信失败。
+            asyncio.TimeoutError: 设备响应超时。
+            AdbError: adb服务器拒绝请求。
+            asyncio.CancelledError: 准备期间被解除。
+        """
+        self._release(serial)
+        prepare = asyncio.ensure_future(asyncio.gather(async_util.shell(serial, WAKE_COMMAND, PROBE_TIMEOUT),
+                                                       service.get(serial, 'snapshot'),
+                                                       service.get(serial, 'encoders')))
+        self._preparing[serial] = prepare
+        try:
+            await prepare
+        finally:
+            if self._preparing.get(serial) is prepare:
+                del self._preparing[serial]
+        sock = reserve_port({*self.ports.values(), *self._taken})
+        self._sockets[serial] = sock
+        self.ports[serial] = sock.getsockname()[1]
+        self._keepalive[serial] = asyncio.ensure_future(self._keep_awake(serial))
+        return self.ports[serial]
+
+    async def disarm(self, serial=None):
+        """解除某设备（为None时为全部设备）的热备，包括仍在准备中的设备。"""
+        for target in [serial] if serial else self._armed():
+            self._release(target)
+
+    async def switch(self, serial):
+        """只保留serial的热备，serial为None时全部解除。其他设备在第一次await之前即被解除，连续切换不会遗留热备。"""
+        for other in self._armed():
+            if other != serial:
+                self._release(other)
+        if serial:
+            return await self.arm(serial)
+
+    def take(self, serial):
+        """
+        启动时取出为设备预留的端口，释放绑定以便scrcpy使用。
+
+        返回值:
+            list: 附加的scrcpy参数，设备未处于热备时为空列表。
+        """
+        sock = self._sockets.pop(serial, None)
+        port = self.ports.pop(serial, None)
+        if sock:
+            sock.close()
+        if port is None:
+            return []
+        self._taken.append(port)
+        return [f'--port={port}']
+
+    def _armed(self):
+        return {*self._preparing, *self._keepalive, *self.ports}
+
+    def _release(self, serial):
+        for tasks in (self._preparing, self._keepalive):
+            if task := tasks.pop(serial, None):
+                task.cancel()
+        self.ports.pop(serial, None)
+        if sock := self._sockets.pop(serial, None):
+            sock.close()
+
+    async def _keep_awake(self, serial):
+        while True:
+            await asyncio.sleep(self.wake_interval)
+            try:
+                await async_util.shell(serial, WAKE_COMMAND, PROBE_TIMEOUT)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, adb_client.AdbError):
+                pass
+
+
+standby = HotStandby()
@@ -0,0 +1,56 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import util
+from capability import Encoder
+
+# scrcpy 2.5（bin/scrcpy-server）的--list-encoders输出：名称带引号，不标注编码器类型
+SCRCPY_2_5_OUTPUT = """scrcpy 2.5 <https://github.com/Genymobile/scrcpy>
+INFO: ADB device found:
+INFO:     -->   (usb)  R58M1234567  device  SM_G960F
+/usr/local/share/scrcpy/scrcpy-server: 1 file pushed, 0 skipped. 56.8 MB/s (69007 bytes in 0.001s)
+[server] INFO: Device: [samsung] samsung SM-G960F (Android 10)
+[server] INFO: List of video encoders:
+    --video-codec=h264 --video-encoder='OMX.Exynos.AVC.Encoder'
+    --video-codec=h264 --video-encoder='c2.android.avc.encoder'
+    --video-codec=h264 --video-encoder='OMX.google.h264.encoder'
+    --video-codec=h265 --video-encoder='OMX.Exynos.HEVC.Encoder'
+    --video-codec=h265 --video-encoder='c2.android.hevc.encoder'
+[server] INFO: List of audio encoders:
+    --audio-codec=opus --audio-encoder='c2.android.opus.encoder'
+    --audio-codec=aac --audio-encoder='c2.android.aac.encoder'
+    --audio-codec=aac --audio-encoder='OMX.google.aac.encoder'
+"""
+
+# 更新版本的输出：不带引号，附加类型与别名标记
+SCRCPY_TAGGED_OUTPUT = """[server] INFO: List of video encoders:
+    --video-codec=h264 --video-encoder=c2.qti.avc.encoder               (hw) [vendor]
+    --video-codec=h264 --video-encoder=OMX.qcom.video.encoder.avc       (hw) [vendor] (alias for c2.qti.avc.encoder)
+    --video-codec=h264 --video-encoder=c2.android.avc.encoder           (sw)
+"""
+
+
+def test_parse_scrcpy_2_5_encoders():
+    encoders = util.parse_encoders(SCRCPY_2_5_OUTPUT)
+    assert encoders.encoders[:3] == (
+        Encoder('video', 'h264', 'OMX.Exynos.AVC.Encoder', 'hw', False),
+        Encoder('video', 'h264', 'c2.android.avc.encoder', 'sw', False),
+        Encoder('video', 'h264', 'OMX.google.h264.encoder', 'sw', False),
+    )
+    assert len(encoders.encoders) == 8
+    assert encoders.codecs('video') == {'h264', 'h265'}
+    assert encoders.best('video', 'h264').name == 'OMX.Exynos.AVC.Encoder'
+    assert encoders.best('video', 'h265').name == 'OMX.Exynos.HEVC.Encoder'
+    assert encoders.best('audio', 'opus') is None
+
+
+def test_parse_tagged_encoders():
+    encoders = util.parse_encoders(SCRCPY_TAGGED_OUTPUT)
+    assert encoders.encoders == (
+        Encoder('video', 'h264', 'c2.qti.avc.encoder', 'hw', False),
+        Encoder('video', 'h264', 'OMX.qcom.video.encoder.avc', 'hw', True),
+        Encoder('video', 'h264', 'c2.android.avc.encoder', 'sw', False),
+    )
+    assert encoders.best('video', 'h264').name == 'c2.qti.avc.encoder'
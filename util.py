@@ -1,6 +1,16 @@
+import os
 import re
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import adb_client
+import runner
+import scrcpy_server
+from capability import Camera, CameraSize, Encoder, Encoders, guess_encoder_type
 from consts import *
+from device_cache import cache, store
 
 
 def devices():
@@ -17,112 +27,592 @@ def devices():
     unauthorized_devices = []
     offline_devices = []
 
-    # 执行adb devices命令获取设备列表
-    result = subprocess.run([ADB, 'devices'], capture_output=True, text=True, creationflags=CREATE_NO_WINDOW)
-    output = result.stdout
-
-    # 解析adb devices命令的输出
-    lines = output.strip().split('\n')
-    for line in lines[1:]:  # 跳过第一行表头
-        parts = line.split()
-        if len(parts) == 2:
-            device_id, status = parts
-            if status == 'device':
-                # 获取设备名称
-                device_name_result = subprocess.run(
-                    [ADB, '-s', device_id, 'shell', 'settings', 'get', 'global', 'device_name'], capture_output=True,
-                    text=True, creationflags=CREATE_NO_WINDOW)
-                device_name = device_name_result.stdout.strip()
+    # 通过adb服务器协议获取设备列表，服务器未启动时先启动
+    try:
+        device_list = adb_client.client.devices()
+    except ConnectionRefusedError:
+        adb_client.client.start_server()
+        device_list = adb_client.client.devices()
+
+    for device_id, status, _ in device_list:
+        if status == 'device':
+            devices[device_id] = None
+        elif status == 'unauthorized':
+            unauthorized_devices.append(device_id)
+        elif status == 'offline':
+            offline_devices.append(device_id)
+
+    # 不再处于device状态的设备视为已断开，丢弃其缓存
+    cache.retain(devices)
+
+    # 并发获取设备名称，总耗时约为一次往返而不是N次
+    if devices:
+        with ThreadPoolExecutor(max_workers=min(DEVICE_NAME_WORKERS, len(devices))) as executor:
+            for device_id, device_name in zip(devices, executor.map(get_device_name, devices)):
                 devices[device_id] = device_name
-            elif status == 'unauthorized':
-                unauthorized_devices.append(device_id)
-            elif status == 'offline':
-                offline_devices.append(device_id)
 
     return devices, unauthorized_devices, offline_devices
 
 
-def get_display_ids(device_id=None):
+def current_serial(device_id=None):
+    """返回device_id，为None时与adb命令行一致，使用环境变量ANDROID_SERIAL。"""
+    return device_id or os.environ.get('ANDROID_SERIAL')
+
+
+def shell(device_id, command, timeout=None):
+    """
+    在设备上执行shell命令。已知设备代号时复用该设备的常驻shell会话，否则退回单次shell连接。
+
+    参数:
+        device_id (str): 设备代号。如果为None，则使用当前连接的设备。
+        command (str): shell命令。
+        timeout (float, optional): 超时时间（秒）。
+
+    返回值:
+        str: 命令的输出（stdout与stderr合并）。
+    """
+    device_id = current_serial(device_id)
+    if device_id is None:
+        return adb_client.client.shell(None, command, timeout)
+    output, _ = adb_client.client.shell_session(device_id).run(command, timeout)
+    return output
+
+
+SNAPSHOT_SETTINGS = (
+    ('global', 'device_name'),
+    ('global', 'adb_enabled'),
+    ('global', 'stay_on_while_plugged_in'),
+    ('system', 'screen_off_timeout'),
+)
+SNAPSHOT_MARKER = '@@PYQTSCRCPY@@'
+
+
+class DeviceSnapshot:
+    """
+    设备属性快照，由一次shell调用获得：完整的getprop、SNAPSHOT_SETTINGS中的设置项以及wm size/wm density。
+
+    属性:
+        props (dict): getprop的全部属性。
+        settings (dict): 设置项，键为"命名空间/名称"，如"global/device_name"。
+        size (tuple): 当前生效的屏幕分辨率(宽, 高)，无法解析时为None。
+        density (int): 当前生效的屏幕密度，无法解析时为None。
+    """
+
+    def __init__(self, props, settings, size=None, density=None):
+        self.props = props
+        self.settings = settings
+        self.size = size
+        self.density = density
+
+    @property
+    def name(self):
+        name = self.settings.get('global/device_name', '')
+        return name if name and name != 'null' else self.model
+
+    @property
+    def model(self):
+        return self.props.get('ro.product.model', '')
+
+    @property
+    def sdk(self):
+        sdk = self.props.get('ro.build.version.sdk', '')
+        return int(sdk) if sdk.isdigit() else None
+
+    @property
+    def abi(self):
+        return self.props.get('ro.product.cpu.abi', '')
+
+    @property
+    def fingerprint(self):
+        return self.props.get('ro.build.fingerprint', '')
+
+    @property
+    def adb_input_restricted(self):
+        """设备是否未解除ADB Input限制（例如MIUI的“USB调试（安全设置）”）。"""
+        return self.props.get('persist.security.adbinput') == '0'
+
+    @classmethod
+    def parse(cls, output):
+        sections = {}
+        current = None
+        for line in output.splitlines():
+            if line.startswith(SNAPSHOT_MARKER):
+                current = sections.setdefault(line[len(SNAPSHOT_MARKER):].strip(), [])
+            elif current is not None:
+                current.append(line)
+
+        props = {}
+        for line in sections.get('getprop', []):
+            if match := re.match(r'\[(.+?)]: \[(.*)]', line):
+                props[match.group(1)] = match.group(2)
+
+        settings = {}
+        for line in sections.get('settings', []):
+            key, sep, value = line.partition('=')
+            if sep:
+                settings[key.strip()] = value.strip()
+
+        size = density = None
+        for line in sections.get('wm', []):
+            # Override的值在Physical之后输出，以最终生效的值为准
+            if match := re.match(r'(?:Physical|Override) size: (\d+)x(\d+)', line.strip()):
+                size = int(match.group(1)), int(match.group(2))
+            elif match := re.match(r'(?:Physical|Override) density: (\d+)', line.strip()):
+                density = int(match.group(1))
+
+        return cls(props, settings, size, density)
+
+
+def snapshot_command():
+    commands = [f'echo {SNAPSHOT_MARKER}getprop', 'getprop', f'echo {SNAPSHOT_MARKER}settings']
+    commands += [f'echo "{namespace}/{key}=$(settings get {namespace} {key})"' for namespace, key in SNAPSHOT_SETTINGS]
+    commands += [f'echo {SNAPSHOT_MARKER}wm', 'wm size', 'wm density']
+    return '; '.join(commands)
+
+
+def get_snapshot(device_id=None, timeout=None):
     """
-    获取设备的屏幕ID列表。
+    获取设备属性快照（经过设备缓存），只需一次shell往返，所有调用方共享同一份快照。
 
     参数:
         device_id (str, optional): 设备代号。如果为None，则使用当前连接的设备。默认为None。
+        timeout (float, optional): 超时时间（秒），包括等待其他调用方正在进行的加载的时间。
 
     返回值:
-        list: 包含设备屏幕ID的列表。
+        DeviceSnapshot: 设备属性快照。
+
+    异常:
+        TimeoutError: 超过timeout仍未获得快照。
+    """
+    device_id = current_serial(device_id)
+    deadline = time.monotonic() + timeout if timeout else None
+
+    def load():
+        remaining = deadline - time.monotonic() if deadline else None
+        if remaining is not None and remaining <= 0:
+            raise TimeoutError('获取设备属性快照超时')
+        return DeviceSnapshot.parse(shell(device_id, snapshot_command(), remaining))
+
+    return cache.get_or_load(device_id, 'snapshot', load, timeout=timeout)
+
+
+def get_device_name(device_id, timeout=DEVICE_NAME_TIMEOUT):
+    """
+    获取设备名称（来自设备属性快照）。
+
+    参数:
+        device_id (str): 设备代号。
+        timeout (float, optional): 超时时间（秒）。默认为DEVICE_NAME_TIMEOUT。
+
+    返回值:
+        str: 设备名称，超时或查询失败则返回占位名称UNKNOWN_DEVICE_NAME。
+    """
+    try:
+        return get_snapshot(device_id, timeout).name
+    except (OSError, adb_client.AdbError):
+        return UNKNOWN_DEVICE_NAME
+
+
+def get_device_info(device_id=None):
+    """
+    获取设备型号、SDK版本与ABI（来自设备属性快照）。
+
+    参数:
+        device_id (str, optional): 设备代号。如果为None，则使用当前连接的设备。默认为None。
+
+    返回值:
+        dict: 包含model、sdk、abi三个键的字典，sdk无法解析时为None。
+    """
+    snapshot = get_snapshot(device_id)
+    return {'model': snapshot.model, 'sdk': snapshot.sdk, 'abi': snapshot.abi}
+
+
+def get_prop(name, device_id=None):
+    """
+    读取设备属性（来自设备属性快照）。
+
+    参数:
+        name (str): 属性名。
+        device_id (str, optional): 设备代号。如果为None，则使用当前连接的设备。默认为None。
+
+    返回值:
+        str: 属性值，属性不存在时为空字符串。
+    """
+    return get_snapshot(device_id).props.get(name, '')
+
+
+def restart_adb_server():
+    """重启adb服务器。"""
+    adb_client.client.kill_server()
+    cache.clear()
+    adb_client.client.start_server()
+
+
+# 写入磁盘缓存时的编码与解码（JSON对象的键只能是字符串）。屏幕的电源状态随时会变，只保存id与size
+CAPABILITY_CODECS = {
+    'displays': (lambda value: [{'id': display['id'], 'size': display['size']} for display in value],
+                 lambda value: [{**display, 'state': None} for display in value]),
+    'cameras': (lambda value: [camera.to_dict() for camera in value.values()],
+                lambda value: {camera['id']: Camera.from_dict(camera) for camera in value}),
+    'encoders': (Encoders.to_list, Encoders.from_list),
+}
+
+
+def get_fingerprint(device_id):
+    """返回设备的ro.build.fingerprint，获取失败时返回None。"""
+    try:
+        return get_snapshot(device_id).fingerprint or None
+    except (OSError, adb_client.AdbError):
+        return None
+
+
+def load_stored_capability(device_id, key, fingerprint):
+    """
+    从磁盘缓存读取设备能力，命中时放入内存缓存。cached_capability()与async_util.cached_capability()共用。
+
+    返回值:
+        tuple: (value, revalidate)，未命中时value为None；revalidate表示是否应在后台重新探测以验证缓存。
+    """
+    if not fingerprint or (stored := store.get(device_id, fingerprint, key)) is None:
+        return None, False
+    value = CAPABILITY_CODECS[key][1](stored)
+    cache.set(device_id, key, value)
+    return value, store.should_revalidate(device_id, fingerprint, key)
+
+
+def save_capability(device_id, key, fingerprint, value, previous=None):
+    """
+    把探测结果写入两级缓存。cached_capability()与async_util.cached_capability()共用。
+
+    参数:
+        previous (optional): 后台验证时为验证前的缓存值，此时同时记录缓存是否已经过期。
+    """
+    cache.set(device_id, key, value)
+    if not fingerprint:
+        return
+    encode = CAPABILITY_CODECS[key][0]
+    encoded = encode(value)
+    if previous is None:
+        store.set(device_id, fingerprint, key, encoded)
+    else:
+        # 按写入磁盘的内容比较，不保存的字段（如屏幕的电源状态）变化不算缓存过期
+        store.revalidated(device_id, fingerprint, key, encoded, encoded != encode(previous))
+
+
+def cached_capability(device_id, key, load, cancel_token=None):
+    """
+    依次从内存缓存、磁盘缓存读取设备能力，都未命中时调用load(cancel_token)探测并写入两级缓存。
+    磁盘缓存命中时立即返回，并在后台线程重新探测一次以验证缓存。
+
+    参数:
+        device_id (str): 设备代号，为None时直接探测且不缓存。
+        key (str): 能力名称，须在CAPABILITY_CODECS中。
+        load (callable): 探测函数，参数为取消令牌。
+        cancel_token (runner.CancelToken, optional): 前台探测使用的取消令牌，后台验证不受其影响。
+    """
+    if device_id is None:
+        return load(cancel_token)
+    if (value := cache.get(device_id, key)) is not None:
+        return value
+
+    fingerprint = get_fingerprint(device_id)
+    value, revalidate = load_stored_capability(device_id, key, fingerprint)
+    if value is not None:
+        if revalidate:
+            def revalidate():
+                try:
+                    fresh = load(None)
+                except (OSError, subprocess.SubprocessError, adb_client.AdbError):
+                    return
+                save_capability(device_id, key, fingerprint, fresh, value)
+
+            threading.Thread(target=revalidate, daemon=True).start()
+        return value
+
+    value = load(cancel_token)
+    save_capability(device_id, key, fingerprint, value)
+    return value
+
+
+def get_displays(device_id=None, cancel_token=None):
+    """
+    获取设备的屏幕列表（经过设备缓存）。
+
+    优先读取系统display服务（dumpsys display），无需推送并启动scrcpy-server；解析不出结果时退回scrcpy --list-displays。
+
+    参数:
+        device_id (str, optional): 设备代号。如果为None，则使用当前连接的设备。默认为None。
+        cancel_token (runner.CancelToken, optional): 取消令牌。
+
+    返回值:
+        list: 按屏幕ID排序的字典列表，每项包含id（int）、size（如'1080x2400'）与state（如'ON'，探测时的状态）。
+              经scrcpy获取或读自磁盘缓存时没有state，值为None。
 
     异常:
         subprocess.CalledProcessError: 如果执行scrcpy --list-displays命令失败，则抛出该异常。
+        subprocess.TimeoutExpired: 超过PROBE_TIMEOUT仍未完成。
+        runner.ProbeCancelled: 被取消。
+    """
+    device_id = current_serial(device_id)
+    displays = cached_capability(device_id, 'displays', lambda token: _list_displays(device_id, token), cancel_token)
+    return [dict(display) for display in displays]
+
+
+def get_display_ids(device_id=None, cancel_token=None):
+    """
+    获取设备的屏幕ID列表（经过设备缓存）。
+
+    参数:
+        device_id (str, optional): 设备代号。如果为None，则使用当前连接的设备。默认为None。
+        cancel_token (runner.CancelToken, optional): 取消令牌。
+
+    返回值:
+        list: 包含设备屏幕ID的列表。
+
+    异常:
+        同get_displays()。
     """
-    display_ids = []
+    return [display['id'] for display in get_displays(device_id, cancel_token)]
+
 
-    command = [SCRCPY, '--list-displays']
+def scrcpy_command(option, device_id=None):
+    command = [SCRCPY, option]
     if device_id:
         command.extend(['--serial', device_id])
+    return command
+
+
+# 只取出dumpsys display中与逻辑屏幕相关的行，避免传输完整的输出
+DISPLAY_DUMP_COMMAND = "dumpsys display | grep -E 'mDisplayId=|DisplayInfo\\{'"
 
+
+def dumpsys_displays(device_id):
+    """通过dumpsys display获取屏幕列表，格式同get_displays()；获取或解析失败时返回空列表。"""
     try:
-        result = subprocess.run(command, capture_output=True, text=True, check=True, creationflags=CREATE_NO_WINDOW)
-        output = result.stdout
+        return parse_dumpsys_displays(shell(device_id, DISPLAY_DUMP_COMMAND, PROBE_TIMEOUT))
+    except (OSError, adb_client.AdbError):
+        return []
+
 
-        lines = output.strip().split('\n')
-        for line in lines:
-            if line.startswith('    --display-id='):
-                display_id = int(line.split('=')[1].split()[0])
-                display_ids.append(display_id)
+def _list_displays(device_id, cancel_token=None):
+    return dumpsys_displays(device_id) or parse_displays(
+        list_output('--list-displays', device_id, PROBE_TIMEOUT, cancel_token, check=True))
 
-    except subprocess.CalledProcessError as e:
-        # print(f"执行scrcpy --list-displays命令失败: {e}")
-        raise e
 
-    return display_ids
+def server_option(option):
+    """scrcpy客户端的列出选项对应的server选项，如'--list-camera-sizes'对应'list_camera_sizes'。"""
+    return option.lstrip('-').replace('-', '_')
 
 
-def get_camera_sizes():
+def list_output(option, device_id=None, timeout=PROBE_TIMEOUT, cancel_token=None, check=False):
     """
-    获取设备摄像头支持的分辨率和帧率。
+    获取scrcpy --list-*的输出。已知设备代号时直接在设备上启动已部署的server（见scrcpy_server），
+    部署或server出错时退回scrcpy客户端，后者每次都会重新推送server；超时则直接抛出，不再退回。
+
+    参数:
+        option (str): scrcpy的列出选项，如'--list-camera-sizes'。
+        device_id (str, optional): 设备代号。
+        timeout (float, optional): 截止时间（秒）。默认为PROBE_TIMEOUT。
+        cancel_token (runner.CancelToken, optional): 取消令牌。
+        check (bool, optional): 为True时scrcpy返回码非0则抛出CalledProcessError。
 
     返回值:
-        dict: 包含摄像头ID的字典,每个摄像头ID对应一个字典,
-              该字典的键为分辨率,值为支持的帧率列表。
+        str: 列出的信息。
     """
-    camera_sizes = {}
+    if device_id:
+        try:
+            return scrcpy_server.run_list(device_id, server_option(option), timeout, cancel_token)
+        except (TimeoutError, subprocess.TimeoutExpired):
+            # 超时说明设备本身没有响应，换用scrcpy客户端只会再等一个完整的截止时间
+            raise
+        except (OSError, subprocess.SubprocessError, adb_client.AdbError):
+            pass
+    return runner.run(scrcpy_command(option, device_id), timeout, cancel_token, check).stdout
 
-    result = subprocess.run([SCRCPY, '--list-camera-sizes'], capture_output=True, text=True, creationflags=CREATE_NO_WINDOW)
-    output = result.stdout
 
-    current_camera_id = None
-    high_speed_mode = False
+def parse_dumpsys_displays(output):
+    """
+    解析dumpsys display中的逻辑屏幕信息，返回与get_displays()相同格式的列表；无法解析时返回空列表。
+
+    Android 10起DisplayInfo中带有displayId，更早的版本只能取前面最近一行的mDisplayId。
+    同一屏幕的mOverrideDisplayInfo在mBaseDisplayInfo之后输出，反映实际状态，后者覆盖前者。
+    """
+    displays = {}
+    display_id = None
+
+    for line in output.splitlines():
+        line = line.strip()
+        if match := re.match(r'mDisplayId=(\d+)', line):
+            display_id = int(match.group(1))
+            continue
+        match = re.search(r'm(?:Base|Override)DisplayInfo=DisplayInfo\{(.*)', line)
+        if not match:
+            continue
+        info = match.group(1)
+        id_match = re.search(r'\bdisplayId (\d+)', info)
+        current_id = int(id_match.group(1)) if id_match else display_id
+        if current_id is None:
+            continue
+        size = re.search(r'\breal (\d+) x (\d+)', info)
+        state = re.search(r'\bstate (\w+)', info)
+        displays[current_id] = {
+            'id': current_id,
+            'size': f'{size.group(1)}x{size.group(2)}' if size else None,
+            'state': state.group(1) if state else None,
+        }
+
+    return [displays[display_id] for display_id in sorted(displays)]
+
+
+def parse_displays(output):
+    """解析scrcpy --list-displays的输出，返回与get_displays()相同格式的列表。"""
+    displays = []
 
     lines = output.strip().split('\n')
     for line in lines:
+        if line.startswith('    --display-id='):
+            display_id = int(line.split('=')[1].split()[0])
+            size = re.search(r'\((\d+x\d+)\)', line)
+            displays.append({'id': display_id, 'size': size.group(1) if size else None, 'state': None})
+
+    return displays
+
+
+def get_camera_sizes(device_id=None, cancel_token=None):
+    """
+    获取设备摄像头支持的分辨率和帧率（经过设备缓存）。
+
+    参数:
+        device_id (str, optional): 设备代号。如果为None，则使用当前连接的设备。默认为None。
+        cancel_token (runner.CancelToken, optional): 取消令牌。
+
+    返回值:
+        dict: 以摄像头ID为键、capability.Camera为值的字典。
+
+    异常:
+        subprocess.TimeoutExpired: 超过CAMERA_PROBE_TIMEOUT仍未完成。
+        runner.ProbeCancelled: 被取消。
+    """
+    device_id = current_serial(device_id)
+    return cached_capability(device_id, 'cameras', lambda token: _list_camera_sizes(device_id, token),
+                             cancel_token)
+
+
+def _list_camera_sizes(device_id, cancel_token=None):
+    return parse_camera_sizes(list_output('--list-camera-sizes', device_id, CAMERA_PROBE_TIMEOUT, cancel_token))
+
+
+class CameraSizesParser:
+    """
+    逐行解析scrcpy --list-camera-sizes的输出。
+
+    一个摄像头的信息在遇到下一个--camera-id或输出结束时才完整，此时feed()/close()返回(camera_id, capability.Camera)，
+    其余时候返回None。全部结果保存在cameras中。
+    """
+
+    def __init__(self):
+        self.cameras = {}
+        self._camera_id = None
+        self._facing = None
+        self._sizes = None
+        self._fps = None
+        self._high_speed_mode = False
+
+    def _finish(self):
+        if self._camera_id is None:
+            return None
+        camera_id, self._camera_id = self._camera_id, None
+        # 按scrcpy列出顺序的倒序显示：支持高速模式的分辨率排在最前，其余从小到大
+        self.cameras[camera_id] = Camera(camera_id, reversed(list(self._sizes.values())), self._facing)
+        return camera_id, self.cameras[camera_id]
+
+    def feed(self, line):
         line = line.strip()
         if line.startswith('--camera-id='):
-            match = re.match(r'--camera-id=(\d+).*fps=\[(.*?)]', line)
+            match = re.match(r'--camera-id=(\d+)\s*(?:\((\w+),)?.*fps=\[(.*?)]', line)
             if match:
-                current_camera_id = int(match.group(1))
-                fps = match.group(2).split(', ')
-                if current_camera_id not in camera_sizes:
-                    camera_sizes[current_camera_id] = {}
-                high_speed_mode = False
+                camera = self._finish()
+                self._camera_id = int(match.group(1))
+                self._facing = match.group(2)
+                self._fps = parse_fps(match.group(3))
+                self._sizes = {}
+                self._high_speed_mode = False
+                return camera
         elif line == 'High speed capture (--camera-high-speed):':
-            high_speed_mode = True
-        elif line.startswith('-'):
+            self._high_speed_mode = True
+        elif line.startswith('-') and self._camera_id is not None:
             resolution = line.lstrip('-').strip()
-            if high_speed_mode:
-                resolution_match = re.match(r'(.+?) \(fps=\[(.*?)]\)', resolution)
+            if self._high_speed_mode:
+                resolution_match = re.match(r'(\d+)x(\d+) \(fps=\[(.*?)]\)', resolution)
                 if resolution_match:
-                    resolution_base = resolution_match.group(1).strip()
-                    high_speed_fps = resolution_match.group(2).split(', ')
-                    if resolution_base in camera_sizes[current_camera_id]:
-                        camera_sizes[current_camera_id][resolution_base + '[高速]'] = camera_sizes[current_camera_id].pop(resolution_base) + high_speed_fps
-                    else:
-                        camera_sizes[current_camera_id][resolution_base + '[高速]'] = high_speed_fps
-            else:
-                camera_sizes[current_camera_id][resolution] = fps
+                    width, height = int(resolution_match.group(1)), int(resolution_match.group(2))
+                    size = self._sizes.pop((width, height), CameraSize(width, height))
+                    self._sizes[width, height] = size._replace(high_speed_fps=parse_fps(resolution_match.group(3)))
+            elif resolution_match := re.match(r'(\d+)x(\d+)$', resolution):
+                width, height = int(resolution_match.group(1)), int(resolution_match.group(2))
+                self._sizes[width, height] = CameraSize(width, height, self._fps)
+        return None
+
+    def close(self):
+        return self._finish()
+
+
+def parse_fps(text):
+    """把'15, 24, 30'转换为(15, 24, 30)"""
+    return tuple(int(fps) for fps in text.split(',') if fps.strip().isdigit())
 
-    return {cam_id: dict(reversed(list(resolutions.items()))) for cam_id, resolutions in camera_sizes.items()}
 
+def parse_camera_sizes(output):
+    """解析scrcpy --list-camera-sizes的输出，返回格式同get_camera_sizes()。"""
+    parser = CameraSizesParser()
+    for line in output.strip().split('\n'):
+        parser.feed(line)
+    parser.close()
+    return parser.cameras
+
+
+def get_encoders(device_id=None, cancel_token=None):
+    """
+    获取设备的音视频编码器清单（经过设备缓存）。
+
+    参数:
+        device_id (str, optional): 设备代号。如果为None，则使用当前连接的设备。默认为None。
+        cancel_token (runner.CancelToken, optional): 取消令牌。
+
+    返回值:
+        capability.Encoders: 编码器清单。
+
+    异常:
+        subprocess.TimeoutExpired: 超过PROBE_TIMEOUT仍未完成。
+        runner.ProbeCancelled: 被取消。
+    """
+    device_id = current_serial(device_id)
+    return cached_capability(device_id, 'encoders', lambda token: _list_encoders(device_id, token), cancel_token)
+
+
+def _list_encoders(device_id, cancel_token=None):
+    return parse_encoders(list_output('--list-encoders', device_id, PROBE_TIMEOUT, cancel_token))
+
+
+def parse_encoders(output):
+    """
+    解析scrcpy --list-encoders的输出，返回capability.Encoders。
+
+    scrcpy 2.5输出--video-encoder='名称'，不带类型；更新的版本去掉引号并附加(hw)/(sw)/(hybrid)及(alias for ...)。
+    没有类型时按名称推断，参见capability.guess_encoder_type()。
+    """
+    encoders = []
+
+    for line in output.strip().split('\n'):
+        match = re.match(r"\s*--(video|audio)-codec=(\S+)\s+--\1-encoder=(?:'([^']*)'|(\S+))\s*(?:\((hw|sw|hybrid)\))?(.*)",
+                         line)
+        if match:
+            kind, codec, quoted_name, name, encoder_type, flags = match.groups()
+            name = quoted_name if quoted_name is not None else name
+            encoders.append(Encoder(kind, codec, name, encoder_type or guess_encoder_type(name),
+                                    '(alias for ' in flags))
+
+    return Encoders(encoders)
 
 
 def time_to_seconds(time_str):
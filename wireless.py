@@ -0,0 +1,111 @@
+import asyncio
+import ipaddress
+import socket
+
+import adb_client
+import async_util
+import runner
+from consts import *
+
+# 可直接连接的mDNS服务类型；_adb-tls-pairing需要先配对，不在此列
+MDNS_CONNECT_SERVICES = ('_adb-tls-connect._tcp', '_adb._tcp')
+
+
+async def mdns_services():
+    """
+    通过adb mdns services获取局域网内广播的无线调试设备。
+
+    返回值:
+        list: 可直接连接的设备地址列表，格式为"ip:port"。
+    """
+    _, output = await runner.run_async([ADB, 'mdns', 'services'], WIRELESS_MDNS_TIMEOUT)
+    endpoints = []
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) >= 3 and parts[1].rstrip('.') in MDNS_CONNECT_SERVICES:
+            endpoints.append(parts[2])
+    return endpoints
+
+
+def local_subnet(prefix=24):
+    """返回本机首选IPv4地址所在的网段，获取失败时返回None。"""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            # UDP的connect不会真正发包，只用于让系统选出默认路由对应的本机地址
+            sock.connect(('10.255.255.255', 1))
+            address = sock.getsockname()[0]
+    except OSError:
+        return None
+    return str(ipaddress.ip_network(f'{address}/{prefix}', strict=False))
+
+
+async def scan_subnet(subnet, port=WIRELESS_ADB_PORT, timeout=WIRELESS_PROBE_TIMEOUT,
+                      concurrency=WIRELESS_SCAN_CONCURRENCY):
+    """
+    并发扫描网段内开放了adb端口的主机。
+
+    参数:
+        subnet (str): 网段，如"192.168.1.0/24"。
+        port (int, optional): adb端口。默认为5555。
+        timeout (float, optional): 单个主机的连接超时（秒）。
+        concurrency (int, optional): 最大并发连接数。
+
+    返回值:
+        list: 端口开放的设备地址列表，格式为"ip:port"。
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def probe(host):
+        async with semaphore:
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(str(host), port), timeout)
+            except (OSError, asyncio.TimeoutError):
+                return None
+            writer.close()
+            return f'{host}:{port}'
+
+    results = await asyncio.gather(*(probe(host) for host in ipaddress.ip_network(subnet, strict=False).hosts()))
+    return [endpoint for endpoint in results if endpoint]
+
+
+async def connect(endpoint):
+    """
+    通过adb服务器的host:connect连接无线设备，等价于adb connect <endpoint>。
+
+    返回值:
+        tuple: (是否成功, adb服务器返回的信息)。
+    """
+    try:
+        message = await async_util.host_query(f'host:connect:{endpoint}', WIRELESS_CONNECT_TIMEOUT)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, adb_client.AdbError) as e:
+        return False, str(e)
+    return message.startswith(('connected to', 'already connected to')), message
+
+
+async def discover_and_connect(subnet=None, concurrency=WIRELESS_CONNECT_CONCURRENCY):
+    """
+    并发执行mDNS发现与（可选的）网段扫描，然后以有限并发连接全部发现的设备。
+    连接成功的设备会由adb服务器推送给DeviceTracker，自动出现在设备列表中。
+
+    参数:
+        subnet (str, optional): 额外扫描的网段，为None时只使用mDNS发现。
+        concurrency (int, optional): 同时进行的adb connect数量。
+
+    返回值:
+        dict: 键是设备地址，值是(是否成功, 信息)。
+    """
+    tasks = [mdns_services()]
+    if subnet:
+        tasks.append(scan_subnet(subnet))
+    endpoints = []
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if not isinstance(result, BaseException):
+            endpoints.extend(endpoint for endpoint in result if endpoint not in endpoints)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _connect(endpoint):
+        async with semaphore:
+            return await connect(endpoint)
+
+    return dict(zip(endpoints, await asyncio.gather(*(_connect(endpoint) for endpoint in endpoints))))